@@ -0,0 +1,377 @@
+"""
+Benchmarks every day's solutions against synthetic inputs of increasing size.
+
+Each day has a generator that writes out a valid puzzle input at a requested
+scale. What the scale counts depends on the day, e.g. lines of a calibration
+document or cells of a grid. Every part is solved in a fresh process so that its
+wall time and peak memory aren't polluted by earlier runs, and the results are
+written out as JSON lines.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import math
+import multiprocessing
+import random
+import resource
+import string
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING, Callable, Iterator, NamedTuple, Sequence
+
+from run_days import find_days, load_solution
+
+if TYPE_CHECKING:
+    from multiprocessing.connection import Connection
+
+DIGIT_WORDS = ["one", "two", "three", "four", "five", "six", "seven", "eight", "nine"]
+
+
+def day1_lines(scale: int, rng: random.Random) -> Iterator[str]:
+    """Generate calibration lines of letters, digits, and digit words. Each has a digit."""
+    for _ in range(scale):
+        pieces = [rng.choice(string.digits)]
+        for _ in range(rng.randint(2, 8)):
+            match rng.randint(0, 2):
+                case 0:
+                    pieces.append(rng.choice(string.digits))
+                case 1:
+                    pieces.append(rng.choice(DIGIT_WORDS))
+                case _:
+                    pieces.append("".join(rng.choices(string.ascii_lowercase, k=rng.randint(1, 5))))
+        rng.shuffle(pieces)
+        yield "".join(pieces)
+
+
+def day2_lines(scale: int, rng: random.Random) -> Iterator[str]:
+    """Generate one cube game per line."""
+    colors = ["red", "green", "blue"]
+    for game_id in range(1, scale + 1):
+        turns = []
+        for _ in range(rng.randint(1, 6)):
+            turn_colors = rng.sample(colors, rng.randint(1, 3))
+            turns.append(", ".join(f"{rng.randint(1, 20)} {color}" for color in turn_colors))
+        yield f"Game {game_id}: {'; '.join(turns)}"
+
+
+def day3_lines(scale: int, rng: random.Random) -> Iterator[str]:
+    """Generate a square-ish engine schematic with about `scale` cells."""
+    width = max(1, math.isqrt(scale))
+    for _ in range(max(1, scale // width)):
+        row: list[str] = []
+        while len(row) < width:
+            roll = rng.random()
+            if roll < 0.15:
+                row.extend(str(rng.randint(1, 999)))
+                row.append(".")
+            elif roll < 0.2:
+                row.append(rng.choice("*#+$/@=%&-"))
+            else:
+                row.append(".")
+        yield "".join(row[:width])
+
+
+def day4_lines(scale: int, rng: random.Random) -> Iterator[str]:
+    """
+    Generate scratchcards that never win copies past the end of the table.
+    Wins are kept rare enough that the copy counts don't grow exponentially.
+    """
+    for number in range(1, scale + 1):
+        wins = min(rng.choice([0] * 8 + [1, 2, 3, 4]), scale - number)
+        winning = rng.sample(range(1, 100), 10)
+        losing = [n for n in rng.sample(range(1, 100), 50) if n not in winning]
+        have = winning[:wins] + losing[: 25 - wins]
+        rng.shuffle(have)
+        winning_str = " ".join(f"{n:>2}" for n in winning)
+        have_str = " ".join(f"{n:>2}" for n in have)
+        yield f"Card {number:>3}: {winning_str} | {have_str}"
+
+
+def day5_lines(scale: int, rng: random.Random) -> Iterator[str]:
+    """Generate an almanac with `scale` seeds and square root as many ranges per map."""
+    domain = 2**32
+    seeds = []
+    for _ in range(max(1, scale // 2)):
+        start = rng.randrange(domain)
+        seeds.extend([start, rng.randint(1, min(10**8, domain - start))])
+    yield "seeds: " + " ".join(map(str, seeds))
+
+    categories = ["seed", "soil", "fertilizer", "water", "light", "temperature", "humidity", "location"]
+    range_count = max(2, math.isqrt(scale))
+    for source, destination in zip(categories, categories[1:]):
+        yield ""
+        yield f"{source}-to-{destination} map:"
+        cuts = sorted(rng.sample(range(1, domain), range_count))
+        for start, stop in zip(cuts, cuts[1:]):
+            # Leave some of the domain unmapped
+            if rng.random() < 0.2:
+                continue
+            length = stop - start
+            yield f"{rng.randrange(domain - length)} {start} {length}"
+
+
+def day6_lines(scale: int, rng: random.Random) -> Iterator[str]:
+    """
+    Generate races whose times, read as one number like part 2 does, come to
+    about `scale` milliseconds. Scaling the race count instead would make that
+    number too big for part 2's floating point maths after a few dozen races.
+    Every race can be won, and so can the one long race.
+    """
+    digit_count = max(2, len(str(scale)))
+    while True:
+        times = [rng.randint(10, 99) for _ in range(digit_count // 2)]
+        if digit_count % 2:
+            times.append(rng.randint(2, 9))
+        distances = [rng.randrange(t * t // 4) for t in times]
+
+        long_time, long_distance = (int("".join(map(str, numbers))) for numbers in (times, distances))
+        if 4 * long_distance < long_time * long_time - 4 * long_time:
+            break
+    yield "Time: " + " ".join(f"{t:>4}" for t in times)
+    yield "Distance: " + " ".join(f"{d:>4}" for d in distances)
+
+
+def day7_lines(scale: int, rng: random.Random) -> Iterator[str]:
+    """Generate one hand and bid per line."""
+    for _ in range(scale):
+        yield f"{''.join(rng.choices('23456789TJQKA', k=5))} {rng.randint(1, 1000)}"
+
+
+def day8_lines(scale: int, rng: random.Random) -> Iterator[str]:
+    """
+    Generate a network of about `scale` nodes made of separate ghost loops.
+    Like the real puzzle input, every loop length is a multiple of the turn list
+    length and the only "Z" node closes each loop. The first ghost loop runs
+    from AAA to ZZZ for part 1.
+    """
+    ghost_count = 6
+    per_ghost = max(1, scale // ghost_count)
+    turn_count = max(1, min(31, per_ghost // 2))
+    yield "".join(rng.choices("LR", k=turn_count))
+    yield ""
+
+    for ghost in range(ghost_count):
+        loop_length = turn_count * (max(1, per_ghost // turn_count) + ghost)
+        start, end = ("AAA", "ZZZ") if ghost == 0 else (f"G{ghost}A", f"G{ghost}Z")
+        names = [f"G{ghost}N{i}" for i in range(1, loop_length)] + [end]
+        yield f"{start} = ({names[0]}, {names[0]})"
+        for name, next_name in zip(names, [*names[1:], names[0]]):
+            yield f"{name} = ({next_name}, {next_name})"
+
+
+def day9_lines(scale: int, rng: random.Random) -> Iterator[str]:
+    """Generate sequences of 21 values of a random low degree polynomial."""
+    for _ in range(scale):
+        coefficients = [rng.randint(-5, 5) for _ in range(rng.randint(1, 6))]
+        values = (sum(c * x**i for i, c in enumerate(coefficients)) for x in range(21))
+        yield " ".join(map(str, values))
+
+
+def day10_lines(scale: int, rng: random.Random) -> Iterator[str]:
+    """
+    Generate a grid of about `scale` cells with a snaking pipe loop. The loop
+    runs back and forth along every other row and returns up the left column.
+    The rows in between are filled with junk pipe, half of which ends up inside
+    the loop.
+    """
+    width = max(3, math.isqrt(scale))
+    lane_count = max(2, (scale // width + 1) // 4 * 2)
+    height = lane_count * 2 - 1
+
+    # Walk the loop, starting at the top left corner
+    loop = [(x, 0) for x in range(width)]
+    for lane in range(1, lane_count):
+        turn_x = width - 1 if lane % 2 else 1
+        loop.append((turn_x, lane * 2 - 1))
+        xs = range(width - 1, 0, -1) if lane % 2 else range(1, width)
+        loop.extend((x, lane * 2) for x in xs)
+    loop.extend((0, y) for y in range(height - 1, 0, -1))
+
+    pipes = {
+        frozenset({(0, -1), (0, 1)}): "|",
+        frozenset({(-1, 0), (1, 0)}): "-",
+        frozenset({(0, -1), (1, 0)}): "L",
+        frozenset({(0, -1), (-1, 0)}): "J",
+        frozenset({(0, 1), (-1, 0)}): "7",
+        frozenset({(0, 1), (1, 0)}): "F",
+    }
+    grid = [rng.choices("|-LJ7F.", k=width) for _ in range(height)]
+    for i, (x, y) in enumerate(loop):
+        (prev_x, prev_y), (next_x, next_y) = loop[i - 1], loop[(i + 1) % len(loop)]
+        grid[y][x] = pipes[frozenset({(prev_x - x, prev_y - y), (next_x - x, next_y - y)})]
+    grid[0][0] = "S"
+
+    for row in grid:
+        yield "".join(row)
+
+
+def day11_lines(scale: int, rng: random.Random) -> Iterator[str]:
+    """Generate a square-ish image of about `scale` cells, sprinkled with galaxies."""
+    width = max(2, math.isqrt(scale))
+    empty_xs = {x for x in range(width) if rng.random() < 0.05}
+    for y in range(max(2, scale // width)):
+        if y > 0 and rng.random() < 0.05:
+            yield "." * width
+            continue
+        row = ["#" if x not in empty_xs and rng.random() < 0.02 else "." for x in range(width)]
+        # Make sure there is always a pair of galaxies to measure
+        row[y % 2] = "#"
+        yield "".join(row)
+
+
+class Generator(NamedTuple):
+    unit: str
+    lines: Callable[[int, random.Random], Iterator[str]]
+
+
+GENERATORS: dict[str, Generator] = {
+    "day1": Generator("lines", day1_lines),
+    "day2": Generator("games", day2_lines),
+    "day3": Generator("cells", day3_lines),
+    "day4": Generator("cards", day4_lines),
+    "day5": Generator("seeds", day5_lines),
+    "day6": Generator("ms", day6_lines),
+    "day7": Generator("hands", day7_lines),
+    "day8": Generator("nodes", day8_lines),
+    "day9": Generator("sequences", day9_lines),
+    "day10": Generator("cells", day10_lines),
+    "day11": Generator("cells", day11_lines),
+}
+
+
+def write_input(path: Path, day: str, scale: int, seed: int) -> None:
+    """Write out a generated input line by line so it never has to fit in memory."""
+    rng = random.Random(f"{seed}-{day}-{scale}")
+    with path.open("w") as f:
+        for line in GENERATORS[day].lines(scale, rng):
+            f.write(line)
+            f.write("\n")
+
+
+def peak_rss_kib() -> int:
+    """Return the peak resident memory of this process. Linux reports KiB, macOS bytes."""
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return max_rss // 1024 if sys.platform == "darwin" else max_rss
+
+
+def measure(day: str, part: int, input_path: Path, conn: Connection) -> None:
+    """Solve one part in this (fresh) process and send back what it cost."""
+    solve = getattr(load_solution(day), f"part{part}")
+    baseline_kib = peak_rss_kib()
+
+    try:
+        with input_path.open() as puzzle_input:
+            start = time.perf_counter()
+            answer = str(solve(puzzle_input))
+            seconds = time.perf_counter() - start
+    except Exception as e:  # noqa: BLE001
+        conn.send({"error": repr(e)})
+        return
+
+    conn.send({
+        "answer": answer,
+        "seconds": seconds,
+        "peak_rss_kib": peak_rss_kib(),
+        "baseline_rss_kib": baseline_kib,
+    })
+
+
+def run_measurement(day: str, part: int, input_path: Path, timeout: float) -> dict[str, object]:
+    """Run `measure()` in a fresh process, giving up on it after `timeout` seconds."""
+    context = multiprocessing.get_context("spawn")
+    receiver, sender = context.Pipe(duplex=False)
+    process = context.Process(target=measure, args=(day, part, input_path, sender))
+    process.start()
+
+    if receiver.poll(timeout):
+        result = receiver.recv()
+    else:
+        process.terminate()
+        result = {"error": f"timed out after {timeout}s"}
+    process.join()
+
+    if process.exitcode and "error" not in result:
+        result = {"error": f"exit code {process.exitcode}"}
+    return result
+
+
+class BenchOptions(NamedTuple):
+    output: Path
+    seed: int
+    timeout: float
+
+
+def main(days: Sequence[str], parts: Sequence[int], scales: Sequence[int], options: BenchOptions) -> None:
+    """Benchmark every combination of day, scale, and part."""
+    with options.output.open("w") as results_file, tempfile.TemporaryDirectory() as temp_dir:
+        for day in days:
+            for scale in scales:
+                input_path = Path(temp_dir) / f"{day}-{scale}.txt"
+                write_input(input_path, day, scale, options.seed)
+
+                for part in parts:
+                    record = {
+                        "day": day,
+                        "part": part,
+                        "scale": scale,
+                        "unit": GENERATORS[day].unit,
+                        "input_bytes": input_path.stat().st_size,
+                        **run_measurement(day, part, input_path, options.timeout),
+                    }
+                    results_file.write(json.dumps(record) + "\n")
+                    results_file.flush()
+
+                    cost = record["error"] if "error" in record else f"{record['seconds']:9.3f}s"
+                    print(f"{day:>5} part {part} @ {scale:>10} {record['unit']:<9} {cost}")
+
+                input_path.unlink()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--days",
+        help="Comma separated list of day numbers to benchmark, defaults to all days",
+    )
+    parser.add_argument(
+        "--parts",
+        default="1,2",
+        help="Comma separated list of parts to benchmark",
+    )
+    parser.add_argument(
+        "--scales",
+        default="1000,100000",
+        help="Comma separated list of input sizes to generate",
+    )
+    parser.add_argument(
+        "--output",
+        type=Path,
+        default=Path("bench_output.txt"),
+        help="File to write JSON lines results to",
+    )
+    parser.add_argument(
+        "--seed",
+        type=int,
+        default=2023,
+        help="Seed for the random input generators",
+    )
+    parser.add_argument(
+        "--timeout",
+        type=float,
+        default=60,
+        help="Seconds to let a single part run before giving up on it",
+    )
+    args = parser.parse_args()
+
+    all_days = [day for day in find_days() if day in GENERATORS]
+    days = [f"day{num}" for num in args.days.split(",")] if args.days else all_days
+    if unknown_days := set(days) - set(all_days):
+        parser.error(f"Unknown days: {', '.join(sorted(unknown_days))}")
+
+    parts = [int(part) for part in args.parts.split(",")]
+    scales = [int(scale) for scale in args.scales.split(",")]
+    main(days, parts, scales, BenchOptions(args.output, args.seed, args.timeout))
@@ -3,11 +3,16 @@
 
 <paste in problem description here>
 """
+from __future__ import annotations
 
 import io
+import sys
 from pathlib import Path
 from typing import TextIO
 
+sys.path.append("..")
+from utils import DEFAULT_CACHE_DIR, ParseCache, Solution  # noqa: E402
+
 
 def test_part1() -> None:
     """For example:"""
@@ -25,11 +30,20 @@ def test_part1() -> None:
 # === Part 1 Solution: ===
 
 
-def part1(puzzle_input: TextIO) -> int:
+def parse(puzzle_input: TextIO) -> list[str]:
+    """<parse the puzzle input>"""
+    return puzzle_input.read().splitlines()
+
+
+def solve_part1(parsed: list[str]) -> int:
     """<solve part 1>"""
     return 0
 
 
+def part1(puzzle_input: TextIO) -> int:
+    return solve_part1(parse(puzzle_input))
+
+
 """
 ### Part 2:
 
@@ -53,16 +67,23 @@ def test_part2() -> None:
 # === Part 2 Solution: ===
 
 
-def part2(puzzle_input: TextIO) -> int:
+def solve_part2(parsed: list[str]) -> int:
     """<solve part 2>"""
     return 0
 
 
+def part2(puzzle_input: TextIO) -> int:
+    return solve_part2(parse(puzzle_input))
+
+
+solution = Solution(parse, solve_part1, solve_part2)
+
+
 if __name__ == "__main__":
+    parsed = ParseCache(DEFAULT_CACHE_DIR).get(parse, Path("input.txt"))
+
     # Print out part 1 solution
-    with Path("input.txt").open() as puzzle_input:
-        print("Part 1:", part1(puzzle_input))
+    print("Part 1:", solve_part1(parsed))
 
     # Print out part 2 solution
-    with Path("input.txt").open() as puzzle_input:
-        print("Part 2:", part2(puzzle_input))
+    print("Part 2:", solve_part2(parsed))
@@ -65,7 +65,7 @@ if __name__ == "__main__":
     )
     parser.add_argument(
         "--exclude",
-        default="day_template,make_pycco_pages.py,noxfile.py,__init__.py",
+        default="day_template,make_pycco_pages.py,noxfile.py,run_days.py,bench_days.py,__init__.py",
         help="Comma separated list of file patterns to exclude",
     )
     parser.add_argument(
@@ -9,7 +9,7 @@ from nox.sessions import Session
 
 nox.options.sessions = "lint", "mypy", "xdoctest", "pytest"
 
-locations = "noxfile.py", "make_pycco_pages.py", "src"
+locations = "noxfile.py", "make_pycco_pages.py", "run_days.py", "bench_days.py", "src"
 packages = list(Path("src").glob("day*"))
 
 
@@ -59,6 +59,13 @@ def pytest(session: Session) -> None:
             session.run("pytest", str(package / "main.py"))
 
 
+@nox.session(python=["3.10"])
+def bench(session: Session) -> None:
+    """Benchmark every day against generated inputs."""
+    install_dependencies(session)
+    session.run("python", "bench_days.py", *session.posargs)
+
+
 def install_with_constraints(
     session: Session,
     *args: str,
@@ -0,0 +1,230 @@
+"""
+Runs the solutions for many days at once, spread across a process pool.
+
+Days that expose a `utils.Solution` have their input parsed once and shared by
+both parts. The rest have their input read again for each part.
+"""
+
+from __future__ import annotations
+
+import argparse
+import importlib
+import json
+import os
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, NamedTuple, Sequence
+
+if TYPE_CHECKING:
+    from types import ModuleType
+
+SRC_DIR = Path(__file__).parent / "src"
+
+# Matches `utils.TRACE_ENV_VAR`, which can't be imported until a solution has
+# put `SRC_DIR` on the path.
+TRACE_ENV_VAR = "AOC_TRACE"
+
+
+class Task(NamedTuple):
+    day: str
+    parts: tuple[int, ...]
+    input_path: Path
+    cache_dir: Path | None
+
+
+class RunOptions(NamedTuple):
+    input_dir: Path
+    jobs: int | None
+    cache_dir: Path | None
+    trace_dir: Path | None
+
+
+class Result(NamedTuple):
+    day: str
+    step: str
+    answer: int | None
+    seconds: float
+    error: str | None = None
+
+
+def find_days(src: Path = SRC_DIR) -> list[str]:
+    """Find the name of every day package that has a solution, in calendar order."""
+    days = [main_file.parent.name for main_file in src.glob("day*/main.py")]
+    return sorted(days, key=lambda day: int(day.removeprefix("day")))
+
+
+def load_solution(day: str) -> ModuleType:
+    """Import a day's solution module no matter what the working directory is."""
+    if str(SRC_DIR) not in sys.path:
+        sys.path.insert(0, str(SRC_DIR))
+    return importlib.import_module(f"{day}.main")
+
+
+def run_task(task: Task) -> tuple[list[Result], dict[str, Any] | None]:
+    """
+    Solve the given parts of a single day and time how long each step took.
+    If tracing is enabled, also return the trace of what went on in the steps.
+    """
+    module = load_solution(task.day)
+    from utils import ParseCache, tracer
+
+    tracer.reset()
+    results = []
+
+    solution = getattr(module, "solution", None)
+    with tracer.phase(task.day):
+        if solution is not None:
+            start = time.perf_counter()
+            cache = ParseCache(task.cache_dir)
+            with tracer.phase("parse"):
+                if solution.parse_mapped is not None:
+                    parsed = cache.get_mapped(solution.parse_mapped, task.input_path)
+                else:
+                    parsed = cache.get(solution.parse, task.input_path)
+            results.append(Result(task.day, "parse", None, time.perf_counter() - start))
+
+        for part in task.parts:
+            start = time.perf_counter()
+            with tracer.phase(f"part {part}"):
+                if solution is not None:
+                    answer = getattr(solution, f"part{part}")(parsed)
+                else:
+                    with task.input_path.open() as puzzle_input:
+                        answer = getattr(module, f"part{part}")(puzzle_input)
+            results.append(Result(task.day, f"part {part}", answer, time.perf_counter() - start))
+
+    return results, tracer.to_json() if tracer.enabled else None
+
+
+def write_trace(trace_dir: Path, traces: dict[str, list[dict[str, Any]]]) -> None:
+    """
+    Combine the traces of every task in to a JSON trace and a folded stack file
+    that can be turned in to a flame graph.
+    """
+    from utils import folded_stacks
+
+    combined: dict[str, Any] = {"phases": [], "counters": {}}
+    for day, day_traces in traces.items():
+        counters: Counter[str] = Counter()
+        for trace in day_traces:
+            combined["phases"].extend(trace["phases"])
+            counters.update(trace["counters"])
+        combined["counters"][day] = dict(counters)
+
+    trace_dir.mkdir(parents=True, exist_ok=True)
+    (trace_dir / "trace.json").write_text(json.dumps(combined, indent=2))
+    (trace_dir / "trace.folded").write_text("".join(f"{line}\n" for line in folded_stacks(combined)))
+
+
+def make_tasks(days: Sequence[str], parts: Sequence[int], input_dir: Path, cache_dir: Path | None) -> list[Task]:
+    """
+    Days with a shared parse get one task for all of their parts, so the parse
+    isn't repeated. Every other day gets a task per part so that they can be
+    solved side by side.
+    """
+    tasks: list[Task] = []
+    for day in days:
+        input_path = input_dir / day / "input.txt"
+        if not input_path.is_file():
+            print(f"Skipping {day}, no input at {input_path}", file=sys.stderr)
+            continue
+
+        if hasattr(load_solution(day), "solution"):
+            tasks.append(Task(day, tuple(parts), input_path, cache_dir))
+        else:
+            tasks.extend(Task(day, (part,), input_path, cache_dir) for part in parts)
+    return tasks
+
+
+def main(days: Sequence[str], parts: Sequence[int], options: RunOptions) -> int:
+    """
+    Solve every requested part of every requested day across a process pool.
+    A task that fails is reported as a failed step rather than stopping the
+    rest, and the number of failed tasks is returned.
+    """
+    tasks = make_tasks(days, parts, options.input_dir, options.cache_dir)
+
+    start = time.perf_counter()
+    results: dict[Task, tuple[list[Result], dict[str, Any] | None]] = {}
+    with ProcessPoolExecutor(max_workers=options.jobs) as pool:
+        futures = {pool.submit(run_task, task): task for task in tasks}
+        for future in as_completed(futures):
+            task = futures[future]
+            try:
+                results[task] = future.result()
+            except Exception as e:  # noqa: BLE001
+                results[task] = ([Result(task.day, "failed", None, 0.0, repr(e))], None)
+    total_seconds = time.perf_counter() - start
+
+    # Report in calendar order rather than in order of completion
+    traces: dict[str, list[dict[str, Any]]] = {}
+    failures = 0
+    for task in tasks:
+        task_results, trace = results[task]
+        for day, step, answer, seconds, error in task_results:
+            if error is not None:
+                failures += 1
+                print(f"{day:>5} {step:<6}: {error}")
+                continue
+            answer_str = "" if answer is None else str(answer)
+            print(f"{day:>5} {step:<6}: {answer_str:<20} {seconds:9.3f}s")
+        if trace is not None:
+            traces.setdefault(task.day, []).append(trace)
+    print(f"Total wall time: {total_seconds:.3f}s")
+
+    if options.trace_dir is not None:
+        write_trace(options.trace_dir, traces)
+    return failures
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--days",
+        help="Comma separated list of day numbers to run, defaults to all days",
+    )
+    parser.add_argument(
+        "--parts",
+        default="1,2",
+        help="Comma separated list of parts to run",
+    )
+    parser.add_argument(
+        "--input-dir",
+        type=Path,
+        default=SRC_DIR,
+        help="Directory holding a dayN/input.txt for each day",
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        help="Number of worker processes, defaults to the number of CPUs",
+    )
+    parser.add_argument(
+        "--trace",
+        type=Path,
+        metavar="DIR",
+        help="Trace the phases of each solution and write trace.json and trace.folded to this directory",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        type=Path,
+        help="Directory to keep parsed inputs in between runs, by default they're only kept in memory",
+    )
+    args = parser.parse_args()
+
+    if args.trace:
+        # This has to be set before any solutions are imported, which happens
+        # before the pool's worker processes are started.
+        os.environ[TRACE_ENV_VAR] = "1"
+
+    all_days = find_days()
+    days = [f"day{num}" for num in args.days.split(",")] if args.days else all_days
+    if unknown_days := set(days) - set(all_days):
+        parser.error(f"Unknown days: {', '.join(sorted(unknown_days))}")
+
+    parts = [int(part) for part in args.parts.split(",")]
+    if main(days, parts, RunOptions(args.input_dir, args.jobs, args.cache_dir, args.trace)):
+        sys.exit(1)
@@ -36,9 +36,17 @@ recover. On each line, the calibration value can be found by combining the
 from __future__ import annotations
 
 import re
+import sys
+from concurrent.futures import ProcessPoolExecutor
 from functools import partial
 from pathlib import Path
-from typing import Iterable
+from typing import TYPE_CHECKING, Iterable
+
+if TYPE_CHECKING:
+    import mmap
+
+sys.path.append("..")
+from utils import MappedInput, digit_mask  # noqa: E402
 
 
 def test_part1() -> None:
@@ -224,20 +232,147 @@ def test_get_line_digits() -> None:
     assert get_line_digits("7pqrstsixteen", use_words=True) == ["7", "six"]
 
 
+"""
+That works, but `re.findall()` collects every digit on the line when only the
+first and the last are needed. On long lines that's a lot of wasted matching.
+
+Instead, the lines can be scanned with an
+[Aho-Corasick](https://en.wikipedia.org/wiki/Aho%E2%80%93Corasick_algorithm)
+automaton. It steps through the line a character at a time, tracking every
+digit word that could be in progress at once, so it can stop as soon as it
+reaches the end of the first digit. The last digit is found the same way by
+an automaton built from the reversed words, scanning the line from the end.
+
+Since no digit word is found inside of another, the first match to end is
+also the first to start, so stopping at the first match is always right.
+
+Part 1 only looks for digit characters though, and a regex search finds the
+first of those in C without collecting the rest.
+"""
+
+
+class DigitScanner:
+    """Finds the first or last of a set of words in a line, as its digit value."""
+
+    def __init__(self, words: dict[str, str]):
+        self.forward = self._build(words)
+        self.backward = self._build({word[::-1]: digit for word, digit in words.items()})
+
+    @staticmethod
+    def _build(words: dict[str, str]) -> tuple[list[dict[str, int]], list[str | None]]:
+        """
+        Build the automaton as a table of transitions for each state, and the
+        digit matched on reaching each state, if any. Every state starts from
+        the root, state 0, which is also where any unknown character leads.
+        """
+        transitions: list[dict[str, int]] = [{}]
+        outputs: list[str | None] = [None]
+
+        # First, the trie of all the words
+        for word, digit in words.items():
+            state = 0
+            for char in word:
+                if char not in transitions[state]:
+                    transitions.append({})
+                    outputs.append(None)
+                    transitions[state][char] = len(transitions) - 1
+                state = transitions[state][char]
+            outputs[state] = digit
+
+        # Then, going breadth first, fill in the transitions that the trie is
+        # missing by following the failure link of each state. This is the
+        # state for the longest suffix of the state's text that is also in the
+        # trie. This way the scan never has to backtrack.
+        alphabet = {char for word in words for char in word}
+        failures = [0] * len(transitions)
+        queue = [transitions[0][char] for char in sorted(transitions[0])]
+        transitions[0] = {char: transitions[0].get(char, 0) for char in alphabet}
+
+        for state in queue:
+            failure = failures[state]
+            if outputs[state] is None:
+                outputs[state] = outputs[failure]
+
+            for char in alphabet:
+                if char in transitions[state]:
+                    child = transitions[state][char]
+                    failures[child] = transitions[failure][char]
+                    queue.append(child)
+                else:
+                    transitions[state][char] = transitions[failure][char]
+
+        return transitions, outputs
+
+    @staticmethod
+    def _scan(automaton: tuple[list[dict[str, int]], list[str | None]], chars: Iterable[str]) -> str:
+        transitions, outputs = automaton
+        state = 0
+        for char in chars:
+            state = transitions[state].get(char, 0)
+            if (digit := outputs[state]) is not None:
+                return digit
+        msg = "No digits found"
+        raise ValueError(msg)
+
+    def first(self, line: str) -> str:
+        return self._scan(self.forward, line)
+
+    def last(self, line: str) -> str:
+        return self._scan(self.backward, reversed(line))
+
+
+class DigitSearch:
+    """
+    Finds the first or last digit character in a line. With no words to look
+    for, a regex does this in C, which is far quicker than stepping through an
+    automaton a character at a time in Python.
+    """
+
+    pattern = re.compile(r"[0-9]")
+
+    def first(self, line: str) -> str:
+        return self._search(line)
+
+    def last(self, line: str) -> str:
+        # Reversing the line is a quick copy in C, and beats backtracking to the
+        # last digit with a regex on long lines
+        return self._search(line[::-1])
+
+    def _search(self, line: str) -> str:
+        if (match := self.pattern.search(line)) is None:
+            msg = "No digits found"
+            raise ValueError(msg)
+        return match.group()
+
+
+# For part 1 just the digit characters are searched for, while for part 2 the
+# digit words are scanned for too
+digit_chars = {digit: digit for digit in "0123456789"}
+digit_scanner = DigitSearch()
+word_scanner = DigitScanner({**digit_dict, **digit_chars})
+
+
+def test_digit_scanner() -> None:
+    assert word_scanner.first("xtwone3four") == "2"
+    assert word_scanner.last("xtwone3four") == "4"
+    assert word_scanner.first("zoneight234") == "1"
+    assert word_scanner.last("eightwo") == "2"
+    assert word_scanner.first("ninine") == "9"
+    assert word_scanner.last("sevenine") == "9"
+    assert word_scanner.first("thrthree") == "3"
+    assert digit_scanner.first("treb7uchet") == digit_scanner.last("treb7uchet") == "7"
+    assert digit_scanner.first("a1b2c3d4e5f\n") == "1"
+    assert digit_scanner.last("a1b2c3d4e5f\n") == "5"
+
+
 def get_line_value(line: str, *, use_words: bool = False) -> int:
     """
-    Take the digits that are parsed from a line and creates the value of the
+    Find the first and last digits of a line to create the value of the
     trebuchet calibration, that being the first and last digit interpreted as a
     two digit number.
     """
-    digits = get_line_digits(line, use_words=use_words)
-
-    if use_words:
-        # If spelled out digits are being used, then replace all the english
-        # word versions of the digits to single digit characters here.
-        digits = [digit_dict.get(d, d) for d in digits]
-
-    return int(digits[0] + digits[-1], 10)
+    scanner = word_scanner if use_words else digit_scanner
+    return int(scanner.first(line) + scanner.last(line), 10)
 
 
 def get_calibration_sum(lines: Iterable[str], *, use_words: bool = False) -> int:
@@ -248,19 +383,205 @@ def get_calibration_sum(lines: Iterable[str], *, use_words: bool = False) -> int
     return sum(map(partial(get_line_value, use_words=use_words), lines))
 
 
-def part1(lines: Iterable[str]) -> None:
+def part1(lines: Iterable[str]) -> int:
     """Part 1 just gets the normal calibration sum."""
-    print("Part1:", get_calibration_sum(lines))
+    return get_calibration_sum(lines)
 
 
-def part2(lines: Iterable[str]) -> None:
+def part2(lines: Iterable[str]) -> int:
     """Part 2 gets the calibration sum with spelled out digits included."""
-    print("Part2:", get_calibration_sum(lines, use_words=True))
+    return get_calibration_sum(lines, use_words=True)
+
+
+"""
+### Part 1 in bulk
+
+Without the spelled out digits, the first and last digits of every line can be
+found for the whole document at once with NumPy, rather than a line at a time.
+The offsets of all the digit bytes and all the newlines are found in bulk. Since
+both are sorted, a binary search of the digit offsets for the start of each line
+finds its first digit, and a search for the end of each line finds the digit
+just before its last.
+"""
+
+
+def get_digit_calibration_sum(document: bytes | mmap.mmap) -> int:
+    """
+    Get the part 1 calibration sum straight from a document's bytes. Falls back
+    to `get_calibration_sum()` when NumPy isn't installed.
+    """
+    try:
+        import numpy as np
+    except ImportError:
+        return get_calibration_sum(bytes(document).decode().splitlines())
+
+    data = np.frombuffer(document, dtype=np.uint8)
+    if len(data) == 0:
+        return 0
+
+    digits = np.flatnonzero(digit_mask(data))
+    line_ends = np.flatnonzero(data == ord("\n"))
+    if data[-1] != ord("\n"):
+        line_ends = np.append(line_ends, len(data))
+    line_starts = np.concatenate(([0], line_ends[:-1] + 1))
+
+    first_index = np.searchsorted(digits, line_starts)
+    last_index = np.searchsorted(digits, line_ends) - 1
+
+    # A line without any digits has its first digit after its end
+    if (first_index > last_index).any():
+        msg = "No digits found"
+        raise ValueError(msg)
+
+    first_digits = data[digits[first_index]].astype(np.int64) - ord("0")
+    last_digits = data[digits[last_index]].astype(np.int64) - ord("0")
+    return int(10 * first_digits.sum() + last_digits.sum())
+
+
+def test_get_digit_calibration_sum() -> None:
+    import pytest
+
+    pytest.importorskip("numpy")
+
+    lines = ["1abc2", "pqr3stu8vwx", "a1b2c3d4e5f", "treb7uchet"]
+    assert get_digit_calibration_sum("\n".join(lines).encode()) == 142
+    assert get_digit_calibration_sum("\n".join(lines).encode() + b"\n") == 142
+    assert get_digit_calibration_sum(b"") == 0
+
+    with pytest.raises(ValueError, match="No digits found"):
+        get_digit_calibration_sum(b"1abc2\nabc\n3")
+
+
+"""
+### Huge calibration documents
+
+Every line's value is found on its own, so a big enough document can be split
+up and summed a piece at a time on every core. The document is split in to byte
+ranges that end on newlines, and each worker process maps the file and sums just
+the lines in its range.
+"""
+
+# Upper limit on the bytes a worker decodes at once, to keep memory use in check
+# for documents that are many times bigger than the number of workers
+MAX_CHUNK_BYTES = 64 * 1024 * 1024
+
+
+def get_chunk_calibration_sum(path: Path, byte_range: range, *, use_words: bool = False) -> int:
+    """Get the calibration sum of just the lines in a range of a document's bytes."""
+    with MappedInput.open(path) as document:
+        chunk = document.buffer[byte_range.start : byte_range.stop]
+
+    if not use_words:
+        return get_digit_calibration_sum(chunk)
+    return get_calibration_sum(chunk.decode().splitlines(), use_words=use_words)
+
+
+def get_calibration_sum_parallel(path: Path, *, use_words: bool = False, jobs: int | None = None) -> int:
+    """Get the calibration sum of a whole document, split over `jobs` processes."""
+    with MappedInput.open(path) as document:
+        byte_ranges = document.line_chunks(jobs, MAX_CHUNK_BYTES)
+
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        chunk_sum = partial(get_chunk_calibration_sum, path, use_words=use_words)
+        return sum(pool.map(chunk_sum, byte_ranges))
+
+
+def test_get_calibration_sum_parallel(tmp_path: Path) -> None:
+    lines = ["two1nine", "abcone2threexyz", "xtwone3four", "4nineeightseven2", "zoneight234", "7pqrstsixteen"] * 50
+    document = tmp_path / "input.txt"
+    document.write_text("\n".join(lines))
+
+    for use_words in (False, True):
+        expected = get_calibration_sum(lines, use_words=use_words)
+        assert get_calibration_sum_parallel(document, use_words=use_words, jobs=2) == expected
+
+
+def test_mapped_lines(tmp_path: Path) -> None:
+    import pytest
+
+    lines = ["1abc2", "pqr3stu8vwx", "a1b2c3d4e5f", "treb7uchet"]
+    path = tmp_path / "input.txt"
+    path.write_text("\n".join(lines))
+
+    with MappedInput.open(path) as document:
+        assert [line.tobytes().decode() for line in document.lines()] == lines
+        assert get_calibration_sum(line.tobytes().decode() for line in document.lines()) == 142
+
+        # The mapped file can be handed to NumPy as it is, without copying it
+        assert get_digit_calibration_sum(document.buffer) == 142
+
+        # Stopping early lets go of the generator's view of the whole file, but
+        # the line views handed out have to be let go of too
+        for line in document.lines():
+            assert line.tobytes() == b"1abc2"
+            break
+        with pytest.raises(BufferError):
+            document.close()
+        line.release()
+
+    # Released views can't be read any more
+    with pytest.raises(ValueError, match="released"):
+        line.tobytes()
+
+
+"""
+### Growing calibration documents
+
+A document that is still being written to, like a log file, can be summed as it
+grows by feeding each new piece of it to a `CalibrationStream`. A piece can end
+anywhere, even in the middle of a spelled out digit like `"ei"` + `"ght"`, so
+whatever comes after the last newline is held back until the rest of its line
+shows up. Lines are only ever looked at once, when they are complete.
+"""
+
+
+class CalibrationStream:
+    """A running calibration sum of a document that is fed in a piece at a time."""
+
+    def __init__(self, *, use_words: bool = False):
+        self.use_words = use_words
+        self.total = 0
+        self._partial_line: list[str] = []
+
+    def feed(self, text: str) -> int:
+        """Add a piece of the document and return the calibration sum so far."""
+        *lines, rest = text.split("\n")
+        if lines:
+            # The held back start of a line is finished by the first new line
+            lines[0] = "".join([*self._partial_line, lines[0]])
+            self._partial_line.clear()
+            self.total += get_calibration_sum(filter(None, lines), use_words=self.use_words)
+        if rest:
+            self._partial_line.append(rest)
+        return self.total
+
+    def close(self) -> int:
+        """Count a last line without a newline, and return the final calibration sum."""
+        return self.feed("\n")
+
+
+def test_calibration_stream() -> None:
+    example = "two1nine\neightwothree\nabcone2threexyz\nxtwone3four\n4nineeightseven2\nzoneight234\n7pqrstsixteen"
+
+    stream = CalibrationStream(use_words=True)
+    assert stream.feed("two1ni") == 0
+    assert stream.feed("ne\nei") == 29
+    assert stream.feed("g") == 29
+    assert stream.feed("htwo") == 29
+    assert stream.feed("three\n") == 29 + 83
+    assert stream.close() == 29 + 83
+
+    # However it is cut up, the sum is the same
+    for piece_size in (1, 2, 3, 7, len(example)):
+        stream = CalibrationStream(use_words=True)
+        for start in range(0, len(example), piece_size):
+            stream.feed(example[start : start + piece_size])
+        assert stream.close() == 281
 
 
 if __name__ == "__main__":
-    with Path("input.txt").open() as f:
-        part1(f)
+    with MappedInput.open(Path("input.txt")) as document:
+        print("Part1:", get_digit_calibration_sum(document.buffer))
 
     with Path("input.txt").open() as f:
-        part2(f)
+        print("Part2:", part2(f))
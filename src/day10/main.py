@@ -6,12 +6,23 @@
 from __future__ import annotations
 
 import io
+import sys
 from enum import Enum
 from pathlib import Path
-from typing import TYPE_CHECKING, Iterable, NamedTuple, TextIO, TypeVar
-
-if TYPE_CHECKING:
-    from _typeshed import SupportsRichComparison
+from typing import Iterable, NamedTuple, TextIO
+
+sys.path.append("..")
+from utils import (  # noqa: E402
+    DEFAULT_CACHE_DIR,
+    ORTHOGONALS,
+    ByteGrid,
+    MappedInput,
+    ParseCache,
+    Pos,
+    Solution,
+    traced,
+    tracer,
+)
 
 
 def test_part1() -> None:
@@ -27,6 +38,8 @@ L|-JF
     # > `""` results in  `...`.
     assert part1(io.StringIO(example)) == 4
 
+    assert parse_mapped(MappedInput(example.encode())) == parse(io.StringIO(example))
+
 
 """
 <end of problem description>
@@ -35,14 +48,6 @@ L|-JF
 # === Part 1 Solution: ===
 
 
-class Pos(NamedTuple):
-    x: int
-    y: int
-
-    def __add__(self: Pos, other: Pos) -> Pos:  # type: ignore[override]
-        return Pos(self.x + other.x, self.y + other.y)
-
-
 class Dir(Enum):
     up = Pos(0, -1)
     down = Pos(0, 1)
@@ -61,9 +66,10 @@ class Dir(Enum):
                 return Dir.left
 
 
-# This will be used to very simply iterate through the pipe links
+# This will be used to very simply iterate through the pipe links. Positions
+# are packed in to ints by the grid's `utils.PosPacker`.
 class Step(NamedTuple):
-    pos: Pos
+    pos: int
     move_dir: Dir
 
 
@@ -76,87 +82,124 @@ class Pipe(Enum):
     down_right = "F"
 
 
+pipe_exits = {
+    Pipe.up_down: (Dir.up, Dir.down),
+    Pipe.left_right: (Dir.left, Dir.right),
+    Pipe.up_right: (Dir.up, Dir.right),
+    Pipe.up_left: (Dir.up, Dir.left),
+    Pipe.down_right: (Dir.down, Dir.right),
+    Pipe.down_left: (Dir.down, Dir.left),
+}
+
+# Moving in to a pipe's tile, which way does the pipe then send you? This is
+# keyed by pipe character and the direction of the move in to the tile, and is
+# only defined for the two ways in to each pipe.
+pipe_turns = {
+    (pipe.value, entrance.opposite()): exit_dir
+    for pipe, (dir1, dir2) in pipe_exits.items()
+    for entrance, exit_dir in ((dir1, dir2), (dir2, dir1))
+}
+
+
+"""
+Instead of building up dictionaries of every pipe and every link between pipes,
+which cost a few hundred bytes per tile, the tiles are kept as they are in a
+`utils.ByteGrid`. The links between pipes are followed by looking at each pipe
+character as the loop reaches it.
+"""
+
+
 class Grid(NamedTuple):
-    start: Pos
-    pipe_map: dict[Pos, Pipe]
-    pipe_steps: dict[Step, Step]
+    start: int
+    tiles: ByteGrid
 
 
+@traced
+def build_grid(tiles: ByteGrid) -> Grid:
+    start = tiles.data.find(b"S")
+    assert start != -1
+    return Grid(start, tiles)
+
+
+@traced
 def parse(puzzle_input: TextIO) -> Grid:
-    start = None
-    pipe_map = {}
-    pipe_steps = {}
-
-    def add_steps(my_pos: Pos, dir1: Dir, dir2: Dir) -> None:
-        """
-        Update pipe_steps with appropriate entries for this pipe. Each pipe has
-        a position and two entrance/exits.
-        """
-        nonlocal pipe_steps
-        pipe_steps[Step(my_pos + dir1.value, dir1.opposite())] = Step(my_pos, dir2)
-        pipe_steps[Step(my_pos + dir2.value, dir2.opposite())] = Step(my_pos, dir1)
-
-    for y, line in enumerate(puzzle_input):
-        for x, char in enumerate(line.rstrip()):
-            # Ignore empty ground
-            if char == ".":
-                continue
-
-            # Something is here
-            pos = Pos(x, y)
-
-            # Save starting position
-            if char == "S":
-                start = pos
-                continue
-
-            # Build up the pipe step network
-            pipe = Pipe(char)
-            pipe_map[pos] = pipe
-            match pipe:
-                case Pipe.up_down:
-                    add_steps(pos, Dir.up, Dir.down)
-                case Pipe.left_right:
-                    add_steps(pos, Dir.left, Dir.right)
-                case Pipe.up_right:
-                    add_steps(pos, Dir.up, Dir.right)
-                case Pipe.up_left:
-                    add_steps(pos, Dir.up, Dir.left)
-                case Pipe.down_right:
-                    add_steps(pos, Dir.down, Dir.right)
-                case Pipe.down_left:
-                    add_steps(pos, Dir.down, Dir.left)
-
-
-    assert start is not None
-    return Grid(start, pipe_map, pipe_steps)
-
-
-def iterate_loop(start_pos: Pos, start_dir: Dir, pipe_steps: dict[Step, Step]) -> Iterable[Step]:
-    next_step = Step(start_pos, start_dir)
+    return build_grid(ByteGrid.from_text(puzzle_input))
+
+
+@traced
+def parse_mapped(puzzle_input: MappedInput) -> Grid:
+    """Parse like `parse()` does, but copy the tiles straight out of the raw bytes."""
+    return build_grid(ByteGrid(puzzle_input.buffer))
+
+
+DIR_STEPS = tuple(d.value for d in Dir)
+
+
+def dir_offsets(tiles: ByteGrid) -> dict[Dir, int]:
+    return {d: tiles.packer.pack(d.value) for d in Dir}
+
+
+def iterate_loop(grid: Grid, start_dir: Dir) -> Iterable[Step]:
+    offsets = dir_offsets(grid.tiles)
+    next_step = Step(grid.start, start_dir)
 
     while True:
         yield next_step
-        if (next_step.pos + next_step.move_dir.value) == start_pos:
+        next_pos = next_step.pos + offsets[next_step.move_dir]
+        if next_pos == grid.start:
             break
-        next_step = pipe_steps[next_step]
+        next_step = Step(next_pos, pipe_turns[grid.tiles[next_pos], next_step.move_dir])
 
 
+@traced
 def find_loop(grid: Grid) -> list[Step]:
     # Find a direction from starting position to start the loop from
-    start_dir = next(d for d in Dir if Step(grid.start, d) in grid.pipe_steps)
-    return list(iterate_loop(grid.start, start_dir, grid.pipe_steps))
+    start_dir = next(
+        Dir(step)
+        for step, neighbor in grid.tiles.neighbors(grid.start, DIR_STEPS)
+        if (grid.tiles[neighbor], Dir(step)) in pipe_turns
+    )
+    loop = list(iterate_loop(grid, start_dir))
 
+    tracer.count("find_loop.steps", len(loop))
+    return loop
 
-def part1(puzzle_input: TextIO) -> int:
-    """<solve part 1>"""
-    grid = parse(puzzle_input)
 
+def test_byte_grid(tmp_path: Path) -> None:
+    example = """\
+-L|F7
+7S-7|
+L|7||
+"""  #
+    path = tmp_path / "input.txt"
+    path.write_text(example)
+
+    tiles = ByteGrid.from_file(path)
+    assert tiles == ByteGrid.from_text(io.StringIO(example))
+    assert (tiles.width, tiles.height) == (5, 3)
+    assert tiles.row(1) == b"7S-7|"
+    assert tiles.column(4) == b"7||"
+    assert list(tiles.find_all("7")) == [tiles.packer.pack(pos) for pos in (Pos(4, 0), Pos(0, 1), Pos(3, 1), Pos(2, 2))]
+
+    # Steps off the grid, including off the side of a row, are left out
+    corner = tiles.packer.pack(Pos(4, 0))
+    assert [tiles[neighbor] for _, neighbor in tiles.neighbors(corner)] == ["F", "7", "|"]
+    assert [step for step, _ in tiles.neighbors(corner, ORTHOGONALS)] == [Pos(0, 1), Pos(-1, 0)]
+    start = tiles.packer.pack(Pos(1, 1))
+    assert len(list(tiles.neighbors(start))) == 8
+
+
+def solve_part1(grid: Grid) -> int:
     loop_steps = find_loop(grid)
 
     return len(loop_steps) // 2
 
 
+def part1(puzzle_input: TextIO) -> int:
+    """<solve part 1>"""
+    return solve_part1(parse(puzzle_input))
+
+
 """
 ### Part 2:
 
@@ -218,27 +261,6 @@ L7JLJL-JLJLJL--JLJ.L
 # === Part 2 Solution: ===
 
 
-if TYPE_CHECKING:
-    T = TypeVar("T", bound=SupportsRichComparison)
-
-def extent(iterable: Iterable[T]) -> tuple[T, T]:
-    it = iter(iterable)
-
-    try:
-        first_item = next(it)
-    except StopIteration:
-        raise ValueError from None
-
-    min_extent = first_item
-    max_extent = first_item
-
-    for i in it:
-        min_extent = min(min_extent, i)
-        max_extent = max(max_extent, i)
-
-    return min_extent, max_extent
-
-
 def get_plug_pipe(dir1: Dir, dir2: Dir) -> Pipe:
     dirs = {dir1, dir2}
 
@@ -263,15 +285,17 @@ def get_plug_pipe(dir1: Dir, dir2: Dir) -> Pipe:
     raise ValueError
 
 
-def plug_hole(loop_steps: list[Step], grid: Grid) -> dict[Pos, Pipe]:
+@traced
+def plug_hole(loop_steps: list[Step], grid: Grid) -> ByteGrid:
     first_step, last_step = loop_steps[0], loop_steps[-1]
 
-    plugged_map = grid.pipe_map.copy()
-    plugged_map[grid.start] = get_plug_pipe(first_step.move_dir, last_step.move_dir.opposite())
-    return plugged_map
+    plugged_tiles = grid.tiles.copy()
+    plugged_tiles[grid.start] = get_plug_pipe(first_step.move_dir, last_step.move_dir.opposite()).value
+    return plugged_tiles
 
 
-def loop_area(loop: list[Step], pipe_map: dict[Pos, Pipe]) -> int:
+@traced
+def loop_area(loop: list[Step], tiles: ByteGrid) -> int:
     # Really wish there was a closed form solution like using the calculus
     # polygon area algo. Maybe scan the lines with only the loop and count
     # toggle from out to in when hitting a boundary? -- but there are tricky
@@ -280,78 +304,78 @@ def loop_area(loop: list[Step], pipe_map: dict[Pos, Pipe]) -> int:
     # We are rasterizing!
     area = 0
 
-    # First, find the extent of our loop
-    x_min, x_max = extent(step.pos.x for step in loop)
-    y_min, y_max = extent(step.pos.y for step in loop)
-
-    # Make a set of all positions that contain loop pipes to allow for quick
-    # loop pipe or empty check.
-    loop_positions = {step.pos for step in loop}
+    # Packed positions sort in raster order, line by line and left to right.
+    # So, by sorting the loop's positions the raster can jump from one loop
+    # pipe to the next rather than visiting every tile in between.
+    loop_positions = sorted(step.pos for step in loop)
+    tracer.count("loop_area.pipes", len(loop_positions))
 
     in_loop: bool = False  # True if raster has passed inside of the loop
     section_head: Pipe | None = None  # The type of pipe at the beginning of this pipe section
-
-    # Rasterize line by line
-    for y in range(y_min, y_max + 1):
-        # Area for each line can be calculated separately
-        for x in range(x_min, x_max + 1):
-            pos = Pos(x, y)
-
-            # If this is not a pipe, skip it
-            # Also, if we are currently inside the loop, increment area
-            if pos not in loop_positions:
-                if in_loop:
-                    area += 1
-                continue
-
-            pipe = pipe_map[pos]
-            match pipe:
-                case Pipe.up_down:
-                    # Immediate cross loop boundary
+    last_pos = 0
+
+    for pos in loop_positions:
+        # Everything skipped over since the last loop pipe is not a loop pipe.
+        # If we are currently inside the loop, they all count towards the area.
+        # The raster always ends a line outside of the loop, so this never
+        # counts anything that wraps around between lines.
+        if in_loop:
+            area += pos - last_pos - 1
+        last_pos = pos
+
+        pipe = Pipe(tiles[pos])
+        match pipe:
+            case Pipe.up_down:
+                # Immediate cross loop boundary
+                in_loop = not in_loop
+
+            case Pipe.up_right:
+                # Entering pipe section
+                section_head = pipe
+
+            case Pipe.down_right:
+                # Entering pipe section
+                section_head = pipe
+
+            case Pipe.left_right:
+                # Traversing pipe section, just skip
+                pass
+
+            case Pipe.up_left:
+                # Ending pipe section
+                if section_head == Pipe.down_right:
                     in_loop = not in_loop
+                section_head = None
 
-                case Pipe.up_right:
-                    # Entering pipe section
-                    section_head = pipe
-
-                case Pipe.down_right:
-                    # Entering pipe section
-                    section_head = pipe
+            case Pipe.down_left:
+                # Ending pipe section
+                if section_head == Pipe.up_right:
+                    in_loop = not in_loop
+                section_head = None
 
-                case Pipe.left_right:
-                    # Traversing pipe section, just skip
-                    pass
+    return area
 
-                case Pipe.up_left:
-                    # Ending pipe section
-                    if section_head == Pipe.down_right:
-                        in_loop = not in_loop
-                    section_head = None
 
-                case Pipe.down_left:
-                    # Ending pipe section
-                    if section_head == Pipe.up_right:
-                        in_loop = not in_loop
-                    section_head = None
+def solve_part2(grid: Grid) -> int:
+    loop_steps = find_loop(grid)
+    plugged_tiles = plug_hole(loop_steps, grid)
 
-    return area
+    return loop_area(loop_steps, plugged_tiles)
 
 
 def part2(puzzle_input: TextIO) -> int:
     """<solve part 2>"""
-    grid = parse(puzzle_input)
+    return solve_part2(parse(puzzle_input))
 
-    loop_steps = find_loop(grid)
-    plugged_map = plug_hole(loop_steps, grid)
 
-    return loop_area(loop_steps, plugged_map)
+solution = Solution(parse, solve_part1, solve_part2, parse_mapped)
 
 
 if __name__ == "__main__":
+    grid = ParseCache(DEFAULT_CACHE_DIR).get_mapped(parse_mapped, Path("input.txt"))
+
     # Print out part 1 solution
-    with Path("input.txt").open() as puzzle_input:
-        print("Part 1:", part1(puzzle_input))
+    print("Part 1:", solve_part1(grid))
 
     # Print out part 2 solution
-    with Path("input.txt").open() as puzzle_input:
-        print("Part 2:", part2(puzzle_input))
+    print("Part 2:", solve_part2(grid))
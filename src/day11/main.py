@@ -13,7 +13,7 @@ from pathlib import Path
 from typing import Iterable, TextIO
 
 sys.path.append("..")
-from utils import Pos, pos_extent  # noqa: E402
+from utils import DEFAULT_CACHE_DIR, ByteGrid, MappedInput, ParseCache, Pos, Solution, pos_extent  # noqa: E402
 
 
 def test_part1() -> None:
@@ -66,10 +66,46 @@ def test_part1() -> None:
 
 
 def parse(puzzle_input: TextIO) -> Iterable[Pos]:
-    for y, line in enumerate(puzzle_input):
-        for x, char in enumerate(line.strip()):
-            if char == "#":
-                yield Pos(x, y)
+    image = ByteGrid.from_text(puzzle_input)
+    yield from map(image.packer.unpack, image.find_all("#"))
+
+
+def parse_mapped(puzzle_input: MappedInput) -> Iterable[Pos]:
+    """
+    Parse like `parse()` does, but straight from the mapped bytes, without
+    copying them in to a `ByteGrid` first.
+    """
+    stride = puzzle_input.row_stride()
+    for offset in puzzle_input.find_all(b"#"):
+        y, x = divmod(offset, stride)
+        yield Pos(x, y)
+
+
+def test_parse_mapped() -> None:
+    example = """\
+...#......
+.......#..
+#.........
+"""  #
+
+    galaxies = list(parse_mapped(MappedInput(example.encode())))
+    assert galaxies == list(parse(io.StringIO(example)))
+    assert galaxies == [Pos(3, 0), Pos(7, 1), Pos(0, 2)]
+
+
+def test_pos_extent() -> None:
+    import pytest
+
+    np = pytest.importorskip("numpy")
+
+    galaxies = [Pos(3, 0), Pos(7, 1), Pos(0, 2)]
+    assert pos_extent(galaxies) == (range(8), range(3))
+    assert pos_extent(np.array(galaxies)) == (range(8), range(3))
+
+    with pytest.raises(ValueError, match="No positions"):
+        pos_extent(np.empty((0, 2), dtype=np.int64))
+    with pytest.raises(ValueError, match="No positions"):
+        pos_extent([])
 
 
 def unparse(galaxies: Iterable[Pos], file: io.TextIOWrapper | None = None) -> None:
@@ -103,14 +139,17 @@ def path_length(pos1: Pos, pos2: Pos) -> int:
     return abs(pos1.x - pos2.x) + abs(pos1.y - pos2.y)
 
 
-def part1(puzzle_input: TextIO) -> int:
-    """<solve part 1>"""
-    galaxies = parse(puzzle_input)
+def solve_part1(galaxies: Iterable[Pos]) -> int:
     expanded_galaxies = expand_space(set(galaxies))
 
     return sum(path_length(a, b) for a, b in combinations(expanded_galaxies, 2))
 
 
+def part1(puzzle_input: TextIO) -> int:
+    """<solve part 1>"""
+    return solve_part1(parse(puzzle_input))
+
+
 """
 ### Part 2:
 
@@ -144,19 +183,25 @@ def test_part2() -> None:
 # === Part 2 Solution: ===
 
 
-def part2(puzzle_input: TextIO, factor: int = 1_000_000) -> int:
-    """<solve part 2>"""
-    galaxies = parse(puzzle_input)
+def solve_part2(galaxies: Iterable[Pos], factor: int = 1_000_000) -> int:
     expanded_galaxies = expand_space(set(galaxies), factor=factor)
 
     return sum(path_length(a, b) for a, b in combinations(expanded_galaxies, 2))
 
 
+def part2(puzzle_input: TextIO, factor: int = 1_000_000) -> int:
+    """<solve part 2>"""
+    return solve_part2(parse(puzzle_input), factor=factor)
+
+
+solution = Solution(parse, solve_part1, solve_part2, parse_mapped)
+
+
 if __name__ == "__main__":
+    galaxies = ParseCache(DEFAULT_CACHE_DIR).get_mapped(parse_mapped, Path("input.txt"))
+
     # Print out part 1 solution
-    with Path("input.txt").open() as puzzle_input:
-        print("Part 1:", part1(puzzle_input))
+    print("Part 1:", solve_part1(galaxies))
 
     # Print out part 2 solution
-    with Path("input.txt").open() as puzzle_input:
-        print("Part 2:", part2(puzzle_input))
+    print("Part 2:", solve_part2(galaxies))
@@ -28,26 +28,44 @@ from __future__ import annotations
 import io
 import math
 import re
-from collections import Counter
-from enum import Enum, auto
+import sys
+from array import array
+from bisect import bisect_left, bisect_right
 from pathlib import Path
-from typing import Iterable, TextIO
+from typing import Callable, Mapping, NamedTuple, Sequence, TextIO
 
+sys.path.append("..")
+from utils import DEFAULT_CACHE_DIR, ParseCache, Solution  # noqa: E402
 
 # You play several games and record the information from each game (your puzzle
 # input). Each game is listed with its ID number (like the `11` in `Game 11:
 # ...`) followed by a semicolon-separated list of subsets of cubes that were
 # revealed from the bag (like `3 red, 5 green, 4 blue`).
-class Cube(Enum):
-    blue = auto()
-    red = auto()
-    green = auto()
-
-Turn = Counter[Cube]
+#
+# Any color of cube could turn up, so the colors are collected as they're found
+# in the record. A turn is then the count of each of those colors, in the order
+# they were found in.
+Turn = tuple[int, ...]
 GameId = int
 Game = tuple[GameId, list[Turn]]
 
 
+class GameRecord(NamedTuple):
+    colors: tuple[str, ...]
+    games: list[Game]
+
+    def counts(self, by_color: Mapping[str, int]) -> Turn:
+        return color_counts(self.colors, by_color)
+
+
+def color_counts(colors: Sequence[str], by_color: Mapping[str, int]) -> Turn:
+    """
+    Get the counts of some named colors, in the order of `colors`. Colors that
+    never turn up in the games don't matter, so they're left out.
+    """
+    return tuple(by_color.get(color, 0) for color in colors)
+
+
 def test_part1() -> None:
     """For example, the record of a few games might look like this:"""
     example = """\
@@ -61,11 +79,11 @@ def test_part1() -> None:
     # back again). The first set is 3 blue cubes and 4 red cubes; the second set
     # is 1 red cube, 2 green cubes, and 6 blue cubes; the third set is only 2
     # green cubes.
-    games = list(parse_input(io.StringIO(example)))
-    _, sets = games[0]
-    assert sets[0] == Counter({Cube.blue: 3, Cube.red: 4})
-    assert sets[1] == Counter({Cube.red: 1, Cube.green: 2, Cube.blue: 6})
-    assert sets[2] == Counter({Cube.green: 2})
+    record = parse_input(io.StringIO(example))
+    _, sets = record.games[0]
+    assert sets[0] == record.counts({"blue": 3, "red": 4})
+    assert sets[1] == record.counts({"red": 1, "green": 2, "blue": 6})
+    assert sets[2] == record.counts({"green": 2})
 
     # The Elf would first like to know which games would have been possible if
     # the bag contained only 12 red cubes, 13 green cubes, and 14 blue cubes?
@@ -85,50 +103,96 @@ only 12 red cubes, 13 green cubes, and 14 blue cubes. **What is the sum of the
 IDs of those games?**
 """
 
-bag_cubes = Counter({Cube.red: 12, Cube.green: 13, Cube.blue: 14})
+bag_cubes = {"red": 12, "green": 13, "blue": 14}
 
 
 # === Part 1 Solution: ===
 
 
-def parse_input(puzzle_input: TextIO) -> Iterable[Game]:
-    """Turn a text description of a set of games into Game objects."""
-    for line in puzzle_input:
-        if m := re.search(r"Game (\d+): (.*)", line):
-            game_id, turns = m.groups()
-            turns = [parse_turn(turn) for turn in turns.split("; ")]
-            yield int(game_id), turns
+# The game's ID, then the counts of each cube color in each of its turns, like
+# the `3` and `red` in `3 red`. The count that ends a turn is followed by a `;`.
+game_pattern = re.compile(r"Game (\d+): ")
+cube_pattern = re.compile(r"(\d+) (\w+)(;?)")
 
 
-def parse_turn(turn_str: str) -> Turn:
-    """Turn a text description of a turn into a Turn object."""
-    def color_count(color_str: str) -> int:
-        """Return the count of the given color."""
-        if m := re.search(rf"(\d+) {color_str}", turn_str):
-            return int(m.group(1))
-        return 0
+def parse_input(puzzle_input: TextIO) -> GameRecord:
+    """Turn a text description of a set of games into Game objects."""
+    # Where each color's count goes in a Turn, in the order they're found
+    color_index: dict[str, int] = {}
+    games = [
+        (int(m.group(1)), parse_turns(line, color_index, m.end()))
+        for line in puzzle_input
+        if (m := game_pattern.search(line))
+    ]
+
+    # Turns from before a color was first found are missing its count
+    color_count = len(color_index)
+    for _, turns in games:
+        for i, turn in enumerate(turns):
+            if len(turn) < color_count:
+                turns[i] = turn + (0,) * (color_count - len(turn))
 
-    return Counter({color: color_count(color.name) for color in Cube})
+    return GameRecord(tuple(color_index), games)
 
 
-def turn_is_valid(turn: Turn, bag: Counter[Cube]) -> bool:
+def parse_turns(turns_str: str, color_index: dict[str, int], start: int = 0) -> list[Turn]:
+    """
+    Turn a text description of a game's turns into Turn objects. Every count of
+    every turn is picked out in one pass over the text, and any colors not
+    shown in a turn are left at 0. New colors are added to `color_index`.
+    """
+    turns = []
+    counts = [0] * len(color_index)
+    for count, color, turn_end in cube_pattern.findall(turns_str, start):
+        index = color_index.setdefault(color, len(color_index))
+        if index >= len(counts):
+            counts.append(0)
+        counts[index] = int(count)
+        if turn_end:
+            turns.append(tuple(counts))
+            counts = [0] * len(color_index)
+    turns.append(tuple(counts))
+    return turns
+
+
+def turn_is_valid(turn: Turn, bag: Turn) -> bool:
     """Return true iff the given Turn could occur with the given Bag."""
-    return len(turn - bag) == 0
+    return all(count <= bag_count for count, bag_count in zip(turn, bag))
 
 
-def part1(puzzle_input: TextIO) -> int:
+def solve_part1(record: GameRecord) -> int:
     """
     Identify which games are composed of all valid turns and return the sum of
     the ID numbers of those valid games.
     """
-    games = parse_input(puzzle_input)
+    bag = record.counts(bag_cubes)
     total = 0
-    for game_id, turns in games:
-        if all(turn_is_valid(t, bag_cubes) for t in turns):
+    for game_id, turns in record.games:
+        if all(turn_is_valid(t, bag) for t in turns):
             total += game_id
     return total
 
 
+def part1(puzzle_input: TextIO) -> int:
+    return solve_part1(parse_input(puzzle_input))
+
+
+def test_other_colors() -> None:
+    """Cubes can come in any color, not just red, green, and blue."""
+    example = """\
+        Game 1: 3 blue, 4 red; 2 green
+        Game 2: 1 blue; 5 purple, 2 red
+        Game 3: 7 orange, 1 green"""  # pycco needs this comment
+
+    record = parse_input(io.StringIO(example))
+    assert record.colors == ("blue", "red", "green", "purple", "orange")
+    assert record.games[0] == (1, [(3, 4, 0, 0, 0), (0, 0, 2, 0, 0)])
+    assert get_min_bag(record.games[1][1]) == record.counts({"blue": 1, "red": 2, "purple": 5})
+
+    # Without any purple or orange cubes in the bag, only game 1 is possible
+    assert solve_part1(record) == 1
+
+
 """
 ### Part 2:
 
@@ -153,27 +217,27 @@ def test_part2() -> None:
         Game 4: 1 green, 3 red, 6 blue; 3 green, 6 red; 3 green, 15 blue, 14 red
         Game 5: 6 red, 1 blue, 3 green; 2 blue, 1 red, 2 green"""  # pycco needs this comment
 
-    games = parse_input(io.StringIO(example))
-    game_iter = iter(games)
+    record = parse_input(io.StringIO(example))
+    game_iter = iter(record.games)
 
     # - In game 1, the game could have been played with as few as 4 red, 2
     #   green, and 6 blue cubes. If any color had even one fewer cube, the game
     #   would have been impossible.
-    assert get_min_bag(next(game_iter)[1]) == Counter({Cube.red: 4, Cube.green: 2, Cube.blue: 6})
+    assert get_min_bag(next(game_iter)[1]) == record.counts({"red": 4, "green": 2, "blue": 6})
 
     # - Game 2 could have been played with a minimum of 1 red, 3 green, and 4
     #   blue cubes.
-    assert get_min_bag(next(game_iter)[1]) == Counter({Cube.red: 1, Cube.green: 3, Cube.blue: 4})
+    assert get_min_bag(next(game_iter)[1]) == record.counts({"red": 1, "green": 3, "blue": 4})
 
     # - Game 3 must have been played with at least 20 red, 13 green, and 6 blue
     #   cubes.
-    assert get_min_bag(next(game_iter)[1]) == Counter({Cube.red: 20, Cube.green: 13, Cube.blue: 6})
+    assert get_min_bag(next(game_iter)[1]) == record.counts({"red": 20, "green": 13, "blue": 6})
 
     # - Game 4 required at least 14 red, 3 green, and 15 blue cubes.
-    assert get_min_bag(next(game_iter)[1]) == Counter({Cube.red: 14, Cube.green: 3, Cube.blue: 15})
+    assert get_min_bag(next(game_iter)[1]) == record.counts({"red": 14, "green": 3, "blue": 15})
 
     # - Game 5 needed no fewer than 6 red, 3 green, and 2 blue cubes in the bag.
-    assert get_min_bag(next(game_iter)[1]) == Counter({Cube.red: 6, Cube.green: 3, Cube.blue: 2})
+    assert get_min_bag(next(game_iter)[1]) == record.counts({"red": 6, "green": 3, "blue": 2})
 
     # The **power** of a set of cubes is equal to the numbers of red, green, and
     # blue cubes multiplied together. The power of the minimum set of cubes in
@@ -190,37 +254,233 @@ is the sum of the power of these sets?**
 # === Part 2 Solution: ===
 
 
-def get_min_bag(turns: list[Turn]) -> Counter[Cube]:
+def get_min_bag(turns: list[Turn]) -> Turn:
     """Get the minimum bag of cubes for which the given turns would be valid."""
-    bag: Counter[Cube] = Counter()
-    for turn in turns:
-        bag |= turn
-    return bag
+    return tuple(map(max, zip(*turns)))
 
 
-def cubes_power(bag: Counter[Cube]) -> int:
+def cubes_power(bag: Turn) -> int:
     """Return the power of a set of cubes."""
-    return math.prod(bag.get(color, 0) for color in Cube)
+    return math.prod(bag)
 
 
-def part2(puzzle_input: TextIO) -> int:
+def solve_part2(record: GameRecord) -> int:
     """
     Determine the minimum valid bag for each game and sum up the product of the
     counts of each cube type.
     """
-    games = parse_input(puzzle_input)
     total = 0
-    for _, turns in games:
+    for _, turns in record.games:
         min_bag = get_min_bag(turns)
         total += cubes_power(min_bag)
     return total
 
 
+def part2(puzzle_input: TextIO) -> int:
+    return solve_part2(parse_input(puzzle_input))
+
+
+"""
+### What-if bags
+
+Both parts only ever need the minimum bag of each game, so for asking about lots
+of different bags the games can be boiled down to a table of their IDs and the
+minimum count of each color. It's kept as columns of packed ints in `array`s,
+which NumPy can use as they are without copying to check every game against a
+whole batch of bags in one go.
+"""
+
+# Limit on the number of game and bag pairs that are checked at once with NumPy,
+# to keep the size of the intermediate arrays in check
+MAX_BATCH_CELLS = 1 << 24
+
+
+class GameTable:
+    """The ID and minimum bag of every game, stored by column."""
+
+    def __init__(self, colors: tuple[str, ...], game_ids: array[int], min_counts: list[array[int]]):
+        self.colors = colors
+        self.game_ids = game_ids
+        self.min_counts = min_counts
+
+    @classmethod
+    def from_record(cls, record: GameRecord) -> GameTable:
+        game_ids = array("q")
+        min_counts = [array("q") for _ in record.colors]
+        for game_id, turns in record.games:
+            game_ids.append(game_id)
+            for column, count in zip(min_counts, get_min_bag(turns)):
+                column.append(count)
+        return cls(record.colors, game_ids, min_counts)
+
+    def __len__(self) -> int:
+        return len(self.game_ids)
+
+    def possible_id_sums(self, bags: Sequence[Mapping[str, int]]) -> list[int]:
+        """For each bag, the sum of the IDs of the games that would have been possible with it."""
+        try:
+            import numpy as np
+        except ImportError:
+            return [self._possible_id_sum(color_counts(self.colors, bag)) for bag in bags]
+
+        if not bags or not len(self):
+            return [0] * len(bags)
+
+        game_ids = np.frombuffer(self.game_ids, dtype=np.int64)
+        min_counts = [np.frombuffer(column, dtype=np.int64) for column in self.min_counts]
+        bag_counts = np.array([color_counts(self.colors, bag) for bag in bags], dtype=np.int64)
+
+        sums = []
+        batch_size = max(MAX_BATCH_CELLS // len(self), 1)
+        for start in range(0, len(bag_counts), batch_size):
+            batch = bag_counts[start : start + batch_size]
+            # Bags by games, true where every color of the game fits in the bag
+            possible = np.ones((len(batch), len(self)), dtype=bool)
+            for color, column in enumerate(min_counts):
+                possible &= column[None, :] <= batch[:, color, None]
+            sums.extend((possible @ game_ids).tolist())
+        return sums
+
+    def _possible_id_sum(self, bag: Turn) -> int:
+        return sum(
+            game_id
+            for game_id, *min_bag in zip(self.game_ids, *self.min_counts)
+            if all(count <= bag_count for count, bag_count in zip(min_bag, bag))
+        )
+
+    def power_sum(self) -> int:
+        """Sum up the powers of every game's minimum bag."""
+        return sum(map(math.prod, zip(*self.min_counts)))
+
+
+def test_game_table() -> None:
+    import pytest
+
+    example = """\
+        Game 1: 3 blue, 4 red; 1 red, 2 green, 6 blue; 2 green
+        Game 2: 1 blue, 2 green; 3 green, 4 blue, 1 red; 1 green, 1 blue
+        Game 3: 8 green, 6 blue, 20 red; 5 blue, 4 red, 13 green; 5 green, 1 red
+        Game 4: 1 green, 3 red, 6 blue; 3 green, 6 red; 3 green, 15 blue, 14 red
+        Game 5: 6 red, 1 blue, 3 green; 2 blue, 1 red, 2 green"""  # pycco needs this comment
+
+    table = GameTable.from_record(parse_input(io.StringIO(example)))
+    bags = [bag_cubes, {}, {"red": 20, "green": 13, "blue": 15}, {"red": 6, "green": 3, "blue": 6}]
+    assert table.possible_id_sums(bags) == [8, 0, 15, 8]
+
+    # Without NumPy, every bag is checked one game at a time instead
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        monkeypatch.setitem(sys.modules, "numpy", None)
+        assert table.possible_id_sums(bags) == [8, 0, 15, 8]
+
+    assert table.power_sum() == 2286
+
+
+"""
+Checking a single bag still means looking at every game though. To answer one
+bag at a time quickly, games can be thought of as points in a space with a
+dimension for each color. The games that fit in a bag are then the ones in the
+box from the origin out to the bag's counts, the ones *dominated* by the bag.
+
+The number of different counts seen of each color is small, so every count is
+swapped for its rank among the counts of its color. Each game lands in a cell
+of a grid of ranks, and a running total of the games in each cell (summed along
+every dimension) gives the total for a whole box from a single cell. Finding
+that cell only takes a binary search of the counts of each color, no matter how
+many games there are.
+"""
+
+# Limit on the cells in a dominance index, since there's one for every
+# combination of the different counts of each color
+MAX_INDEX_CELLS = 1 << 22
+
+
+class DominanceIndex:
+    """Answers which games would have been possible with a bag, without looking at every game."""
+
+    def __init__(self, table: GameTable):
+        self.colors = table.colors
+
+        # The different counts of each color, in order
+        self.levels = [sorted(set(column)) for column in table.min_counts]
+
+        # A dimension for each color, with room for rank 0 (none of a color)
+        self.shape = [len(levels) + 1 for levels in self.levels]
+        self.strides = [math.prod(self.shape[color + 1 :]) for color in range(len(self.shape))]
+        cell_count = math.prod(self.shape)
+        if cell_count > MAX_INDEX_CELLS:
+            msg = f"Index would need {cell_count} cells"
+            raise ValueError(msg)
+
+        # The IDs of the games in each cell
+        self.cells: dict[int, list[int]] = {}
+        for game_id, *min_bag in zip(table.game_ids, *table.min_counts):
+            self.cells.setdefault(self._cell(min_bag, bisect_left, 1), []).append(game_id)
+
+        self.counts = [0] * cell_count
+        self.id_sums = [0] * cell_count
+        for cell, game_ids in self.cells.items():
+            self.counts[cell] = len(game_ids)
+            self.id_sums[cell] = sum(game_ids)
+
+        # Turn the cells in to running totals along each dimension in turn, so
+        # each cell ends up with the total of every cell with lower ranks
+        for size, stride in zip(self.shape, self.strides):
+            for cell in range(cell_count):
+                if (cell // stride) % size:
+                    self.counts[cell] += self.counts[cell - stride]
+                    self.id_sums[cell] += self.id_sums[cell - stride]
+
+    def _cell(self, bag: Sequence[int], search: Callable[[list[int], int], int], offset: int) -> int:
+        return sum(
+            (search(levels, count) + offset) * stride for levels, count, stride in zip(self.levels, bag, self.strides)
+        )
+
+    def _bag_cell(self, bag: Mapping[str, int]) -> int:
+        # The rank of the highest count of each color that fits in the bag
+        return self._cell(color_counts(self.colors, bag), bisect_right, 0)
+
+    def possible_count(self, bag: Mapping[str, int]) -> int:
+        return self.counts[self._bag_cell(bag)]
+
+    def possible_id_sum(self, bag: Mapping[str, int]) -> int:
+        return self.id_sums[self._bag_cell(bag)]
+
+    def possible_ids(self, bag: Mapping[str, int]) -> list[int]:
+        """List the IDs of the games that would have been possible, in no particular order."""
+        bag_counts = color_counts(self.colors, bag)
+        bag_ranks = [bisect_right(levels, count) for levels, count in zip(self.levels, bag_counts)]
+        return [
+            game_id
+            for cell, game_ids in self.cells.items()
+            if all((cell // stride) % size <= rank for size, stride, rank in zip(self.shape, self.strides, bag_ranks))
+            for game_id in game_ids
+        ]
+
+
+def test_dominance_index() -> None:
+    example = """\
+        Game 1: 3 blue, 4 red; 1 red, 2 green, 6 blue; 2 green
+        Game 2: 1 blue, 2 green; 3 green, 4 blue, 1 red; 1 green, 1 blue
+        Game 3: 8 green, 6 blue, 20 red; 5 blue, 4 red, 13 green; 5 green, 1 red
+        Game 4: 1 green, 3 red, 6 blue; 3 green, 6 red; 3 green, 15 blue, 14 red
+        Game 5: 6 red, 1 blue, 3 green; 2 blue, 1 red, 2 green"""  # pycco needs this comment
+
+    index = DominanceIndex(GameTable.from_record(parse_input(io.StringIO(example))))
+    assert index.possible_id_sum(bag_cubes) == 8
+    assert sorted(index.possible_ids(bag_cubes)) == [1, 2, 5]
+    assert index.possible_count({}) == 0
+    assert index.possible_count({"red": 100, "green": 100, "blue": 100}) == 5
+    assert index.possible_id_sum({"red": 14, "green": 3, "blue": 15}) == 1 + 2 + 4 + 5
+
+
+solution = Solution(parse_input, solve_part1, solve_part2)
+
+
 if __name__ == "__main__":
+    games = ParseCache(DEFAULT_CACHE_DIR).get(parse_input, Path("input.txt"))
+
     # Print out part 1 solution
-    with Path("input.txt").open() as puzzle_input:
-        print("Part 1:", part1(puzzle_input))
+    print("Part 1:", solve_part1(games))
 
     # Print out part 2 solution
-    with Path("input.txt").open() as puzzle_input:
-        print("Part 2:", part2(puzzle_input))
+    print("Part 2:", solve_part2(games))
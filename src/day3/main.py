@@ -9,9 +9,27 @@ import io
 import logging
 import math
 import re
-from itertools import chain, product
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from itertools import chain
 from pathlib import Path
-from typing import Iterable, NamedTuple, TextIO
+from typing import TYPE_CHECKING, Any, Iterable, NamedTuple, TextIO
+
+if TYPE_CHECKING:
+    import mmap
+
+sys.path.append("..")
+from utils import (  # noqa: E402
+    ADJACENTS,
+    DEFAULT_CACHE_DIR,
+    ByteGrid,
+    MappedInput,
+    ParseCache,
+    PosPacker,
+    Solution,
+    digit_mask,
+)
 
 
 def test_part1() -> None:
@@ -40,6 +58,7 @@ def test_part1() -> None:
 
     schematic = parse_schematic(io.StringIO(example))
     logging.debug(schematic)
+    assert parse_schematic_mapped(MappedInput(example.encode())) == schematic
 
     # > `""` results in  `...`.
     assert part1(io.StringIO(example)) == 4361
@@ -52,63 +71,151 @@ def test_part1() -> None:
 # === Part 1 Solution: ===
 
 
-class Pos(NamedTuple):
-    x: int
-    y: int
-
-    def __add__(self: Pos, other: Pos) -> Pos:  # type: ignore[override]
-        return Pos(self.x + other.x, self.y + other.y)
+"""
+Rather than keeping a set of `Pos` for every cell of every label, positions are
+packed in to ints with `utils.PosPacker`. A label only ever covers a run of
+cells within one row, so its packed positions are just a `range`.
+"""
 
 
 class Label(NamedTuple):
     number: int
-    pos: set[Pos]
+    pos: range
 
 
 class Symbol(NamedTuple):
     character: str
-    pos: Pos
+    pos: int
+
+
+class Schematic(NamedTuple):
+    labels: list[Label]
+    symbols: list[Symbol]
+    packer: PosPacker
 
 
-def parse_schematic(puzzle_input: TextIO) -> tuple[list[Label], list[Symbol]]:
-    labels: list[Label] = []
-    symbols: list[Symbol] = []
+def find_parts(data: bytes | bytearray | mmap.mmap, packer: PosPacker) -> Schematic:
+    """
+    Find the labels and symbols in the raw bytes of a whole schematic at once.
+    Since every row is the same width, match offsets are already packed
+    positions.
+    """
+    labels = [
+        Label(number=int(label_match.group()), pos=range(label_match.start(), label_match.end()))
+        for label_match in re.finditer(rb"\d+", data)
+    ]
 
-    for line_number, line in enumerate(puzzle_input):
-        # Find all labels
-        for label_match in re.finditer(r"\d+", line):
-            labels.append(Label(  # noqa: PERF401
-                number=int(label_match.group()),
-                pos={Pos(loc, line_number) for loc in range(label_match.start(), label_match.end())}
-            ))
+    symbols = [
+        Symbol(character=symbol_match.group().decode(), pos=symbol_match.start())
+        for symbol_match in re.finditer(rb"[^\s\.\d]", data)
+    ]
 
-        # Find all symbols
-        for symbol_match in re.finditer(r"[^\s\.\d]", line):
-            symbols.append(Symbol(  # noqa: PERF401
-                character=symbol_match.group(),
-                pos=Pos(symbol_match.start(), line_number)
-            ))
+    return Schematic(labels, symbols, packer)
 
-    return labels, symbols
 
+def parse_schematic(puzzle_input: TextIO) -> Schematic:
+    grid = ByteGrid.from_text(puzzle_input)
+    return find_parts(grid.data, grid.packer)
 
-adjacents = [
-    Pos(x, y) for x, y in product([-1, 0, 1], repeat=2)
-    if (x, y) != (0, 0)
-]
 
-def pos_adjacencies(pos: Pos) -> Iterable[Pos]:
-    yield from (pos + adj for adj in adjacents)
+def parse_schematic_mapped(puzzle_input: MappedInput) -> Schematic:
+    """
+    Parse like `parse_schematic()` does, but straight from the mapped bytes,
+    without copying them in to a `ByteGrid` first.
+    """
+    return find_parts(puzzle_input.buffer, PosPacker(puzzle_input.row_stride()))
+
+
+def pos_adjacencies(pos: int, adjacent_offsets: Iterable[int]) -> Iterable[int]:
+    yield from (pos + offset for offset in adjacent_offsets)
+
+
+def solve_part1(schematic: Schematic) -> int:
+    labels, symbols, packer = schematic
+    adjacent_offsets = packer.offsets(ADJACENTS)
+
+    symbol_adjacencies = set(chain.from_iterable(pos_adjacencies(sym.pos, adjacent_offsets) for sym in symbols))
+    matched_labels = [label for label in labels if not symbol_adjacencies.isdisjoint(label.pos)]
+
+    return sum(label.number for label in matched_labels)
 
 
 def part1(puzzle_input: TextIO) -> int:
     """<solve part 1>"""
-    labels, symbols = parse_schematic(puzzle_input)
+    return solve_part1(parse_schematic(puzzle_input))
 
-    symbol_adjacencies = set(chain.from_iterable(pos_adjacencies(sym.pos) for sym in symbols))
-    matched_labels = [label for label in labels if label.pos & symbol_adjacencies]
 
-    return sum(label.number for label in matched_labels)
+"""
+For dense schematics, part 1 can be done with NumPy over the whole grid at once
+instead. Every cell next to a symbol is marked by shifting a mask of the symbols
+one step in each of the 8 directions. Then each run of digits is a part number
+if any of its digits were marked.
+"""
+
+
+def solve_part1_numpy(grid: ByteGrid) -> int:
+    """Solve part 1 like `solve_part1()` does, straight from the grid's bytes. Needs NumPy."""
+    import numpy as np
+
+    cells = grid.to_numpy()
+    height, width = cells.shape
+
+    is_digit = digit_mask(cells)
+    is_symbol = ~is_digit & (cells != ord("."))
+
+    padded_symbols = np.pad(is_symbol, 1)
+    near_symbol = np.zeros_like(is_symbol)
+    for dy in range(3):
+        for dx in range(3):
+            near_symbol |= padded_symbols[dy : dy + height, dx : dx + width]
+
+    # With a blank column at the end of each row, the rows can be laid end to
+    # end without any run of digits carrying on to the next row
+    def flat(array: Any) -> Any:  # noqa: ANN401
+        return np.pad(array, ((0, 0), (0, 1))).ravel()
+
+    digits = flat(is_digit)
+    marked = flat(is_digit & near_symbol)
+    digit_values = flat(cells.astype(np.int64) - ord("0"))
+
+    # Runs of digits start where the mask goes up and end where it comes down
+    edges = np.diff(digits.astype(np.int8), prepend=0, append=0)
+    run_starts = np.flatnonzero(edges == 1)
+    run_ends = np.flatnonzero(edges == -1)
+    if len(run_starts) == 0:
+        return 0
+    run_is_part = np.add.reduceat(marked, run_starts) > 0
+
+    # Each digit is worth its value times 10 to the power of its place in its
+    # run, so a number is the sum of its digits' worths
+    digit_pos = np.flatnonzero(digits)
+    digit_run = np.cumsum(edges[:-1] == 1)[digit_pos] - 1
+    worths = digit_values[digit_pos] * np.power(10, run_ends[digit_run] - 1 - digit_pos, dtype=np.int64)
+    return int(worths[run_is_part[digit_run]].sum())
+
+
+def test_solve_part1_numpy() -> None:
+    import pytest
+
+    pytest.importorskip("numpy")
+
+    example = """\
+467..114..
+...*......
+..35..633.
+......#...
+617*......
+.....+.58.
+..592.....
+......755.
+...$.*....
+.664.598..
+"""  # pycco needs this
+
+    assert solve_part1_numpy(ByteGrid(example.encode())) == 4361
+    assert solve_part1_numpy(ByteGrid(b"12\n*.\n.3")) == 12 + 3
+    assert solve_part1_numpy(ByteGrid(b"1..\n..2")) == 0
+    assert solve_part1_numpy(ByteGrid(b"...")) == 0
 
 
 """
@@ -144,29 +251,222 @@ def test_part2() -> None:
 # === Part 2 Solution: ===
 
 
-def part2(puzzle_input: TextIO) -> int:
-    """<solve part 2>"""
-    labels, symbols = parse_schematic(puzzle_input)
+"""
+To find the labels next to a gear without checking every label, each cell
+that's covered by a label is indexed to that label's place in the list. The
+labels next to a gear are then just the lookups of its 8 neighbors, so the
+whole schematic is handled in a single pass over its labels and symbols.
+"""
+
+
+def index_labels(labels: list[Label]) -> dict[int, int]:
+    """Map the packed position of every cell covered by a label to the label's index."""
+    return {pos: label_id for label_id, label in enumerate(labels) for pos in label.pos}
+
+
+def adjacent_labels(pos: int, adjacent_offsets: Iterable[int], label_at: dict[int, int]) -> set[int]:
+    """Find the indexes of the labels next to a position, each only once."""
+    return {label_at[adjacent] for adjacent in pos_adjacencies(pos, adjacent_offsets) if adjacent in label_at}
+
+
+def solve_part2(schematic: Schematic) -> int:
+    labels, symbols, packer = schematic
+    adjacent_offsets = packer.offsets(ADJACENTS)
+    label_at = index_labels(labels)
 
     gears = (sym for sym in symbols if sym.character == "*")
 
     gear_ratios = 0
 
     for gear in gears:
-        gear_adjacents = set(pos_adjacencies(gear.pos))
-        gear_labels = [label for label in labels if label.pos & gear_adjacents]
+        gear_labels = adjacent_labels(gear.pos, adjacent_offsets, label_at)
         if len(gear_labels) != 2:
             continue
-        gear_ratios += math.prod(label.number for label in gear_labels)
+        gear_ratios += math.prod(labels[label_id].number for label_id in gear_labels)
 
     return gear_ratios
 
 
+def part2(puzzle_input: TextIO) -> int:
+    """<solve part 2>"""
+    return solve_part2(parse_schematic(puzzle_input))
+
+
+"""
+### Streaming
+
+A symbol can only touch labels in the row above it, its own row, and the row
+below it. So, rather than parsing the whole schematic up front, it can be read a
+row at a time while keeping just a window of three rows. Each time a row is
+read, the symbols of the middle row are matched with the labels of the whole
+window. After that, nothing more can touch the labels of the top row, so they're
+done with and it can be dropped.
+"""
+
+
+class Row(NamedTuple):
+    numbers: list[int]
+    # Index in to `numbers` of the label covering each column
+    label_at: dict[int, int]
+    symbols: list[Symbol]
+    # Indexes of labels that have been found next to a symbol
+    matched: set[int]
+
+
+class Contribution(NamedTuple):
+    part_numbers: int
+    gear_ratios: int
+
+
+def parse_row(line: str) -> Row:
+    numbers: list[int] = []
+    label_at: dict[int, int] = {}
+    for label_match in re.finditer(r"\d+", line):
+        label_at.update(dict.fromkeys(range(label_match.start(), label_match.end()), len(numbers)))
+        numbers.append(int(label_match.group()))
+
+    symbols = [
+        Symbol(character=symbol_match.group(), pos=symbol_match.start())
+        for symbol_match in re.finditer(r"[^\s\.\d]", line)
+    ]
+    return Row(numbers, label_at, symbols, set())
+
+
+def stream_contributions(lines: Iterable[str]) -> Iterable[Contribution]:
+    """
+    Yield the part numbers and gear ratios of each row of the schematic in turn,
+    while only holding on to three rows at once.
+    """
+    empty_row = Row([], {}, [], set())
+    above, center = empty_row, empty_row
+    above_gear_ratios = 0
+
+    # Two empty rows at the end let the last rows make it through the window
+    for row_number, below in enumerate(chain(map(parse_row, lines), (empty_row, empty_row))):
+        center_gear_ratios = 0
+        for symbol in center.symbols:
+            x = symbol.pos
+            symbol_numbers: list[int] = []
+            for row in (above, center, below):
+                row_labels = {row.label_at[column] for column in (x - 1, x, x + 1) if column in row.label_at}
+                row.matched.update(row_labels)
+                symbol_numbers.extend(row.numbers[label_id] for label_id in row_labels)
+
+            if symbol.character == "*" and len(symbol_numbers) == 2:
+                center_gear_ratios += math.prod(symbol_numbers)
+
+        # The first two rows in to the window are the starting empty rows
+        if row_number >= 2:
+            yield Contribution(sum(above.numbers[label_id] for label_id in above.matched), above_gear_ratios)
+        above, center = center, below
+        above_gear_ratios = center_gear_ratios
+
+
+def solve_streaming(puzzle_input: TextIO) -> Contribution:
+    """Solve both parts in one go, reading the schematic a row at a time."""
+    part_numbers = gear_ratios = 0
+    for contribution in stream_contributions(puzzle_input):
+        part_numbers += contribution.part_numbers
+        gear_ratios += contribution.gear_ratios
+    return Contribution(part_numbers, gear_ratios)
+
+
+def test_solve_streaming() -> None:
+    example = """\
+467..114..
+...*......
+..35..633.
+......#...
+617*......
+.....+.58.
+..592.....
+......755.
+...$.*....
+.664.598..
+"""  # pycco needs this
+
+    assert solve_streaming(io.StringIO(example)) == (4361, 467835)
+
+
+"""
+### Parallel
+
+Since each row's contribution only depends on the rows either side of it, a
+big schematic can also be split in to bands of rows to be solved side by side.
+Each band is streamed along with one extra row of context above and below it,
+but only the contributions of the band's own rows are kept. That way, labels
+and gears next to the edge of a band are seen by the bands on both sides, but
+are only ever counted by the band they're in.
+"""
+
+
+def solve_band(path: Path, band: range) -> Contribution:
+    """Solve just the rows of the schematic in the given range of its bytes."""
+    with MappedInput.open(path) as schematic:
+        buffer = schematic.buffer
+
+        # Stretch the band out by a row each way
+        context_start = buffer.rfind(b"\n", 0, band.start - 1) + 1 if band.start else 0
+        context_stop = buffer.find(b"\n", band.stop)
+        context_stop = len(buffer) if context_stop == -1 else context_stop + 1
+
+        lines = buffer[context_start:context_stop].decode().splitlines()
+
+    row_contributions = list(stream_contributions(lines))
+    if context_start < band.start:
+        row_contributions = row_contributions[1:]
+    if context_stop > band.stop:
+        row_contributions = row_contributions[:-1]
+
+    return Contribution(
+        sum(contribution.part_numbers for contribution in row_contributions),
+        sum(contribution.gear_ratios for contribution in row_contributions),
+    )
+
+
+def solve_parallel(path: Path, jobs: int | None = None) -> Contribution:
+    """Solve both parts, with bands of the schematic spread over `jobs` processes."""
+    with MappedInput.open(path) as schematic:
+        bands = schematic.line_chunks(jobs)
+
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        band_contributions = list(pool.map(partial(solve_band, path), bands))
+
+    return Contribution(
+        sum(contribution.part_numbers for contribution in band_contributions),
+        sum(contribution.gear_ratios for contribution in band_contributions),
+    )
+
+
+def test_solve_parallel(tmp_path: Path) -> None:
+    example = """\
+467..114..
+...*......
+..35..633.
+......#...
+617*......
+.....+.58.
+..592.....
+......755.
+...$.*....
+.664.598..
+"""  # pycco needs this
+    schematic = tmp_path / "input.txt"
+    schematic.write_text(example)
+
+    # With this many jobs, there's a band for about every row
+    assert solve_parallel(schematic, jobs=2) == (4361, 467835)
+    assert solve_parallel(schematic, jobs=1) == (4361, 467835)
+
+
+solution = Solution(parse_schematic, solve_part1, solve_part2, parse_schematic_mapped)
+
+
 if __name__ == "__main__":
+    schematic = ParseCache(DEFAULT_CACHE_DIR).get_mapped(parse_schematic_mapped, Path("input.txt"))
+
     # Print out part 1 solution
-    with Path("input.txt").open() as puzzle_input:
-        print("Part 1:", part1(puzzle_input))
+    print("Part 1:", solve_part1(schematic))
 
     # Print out part 2 solution
-    with Path("input.txt").open() as puzzle_input:
-        print("Part 2:", part2(puzzle_input))
+    print("Part 2:", solve_part2(schematic))
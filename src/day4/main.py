@@ -8,9 +8,13 @@ from __future__ import annotations
 import io
 import logging
 import re
-from collections import Counter
+import sys
+from collections import Counter, deque
 from pathlib import Path
-from typing import Iterable, NamedTuple, TextIO, TypeVar
+from typing import Iterable, NamedTuple, TextIO
+
+sys.path.append("..")
+from utils import DEFAULT_CACHE_DIR, ParseCache, Solution  # noqa: E402
 
 
 def test_part1() -> None:
@@ -38,40 +42,63 @@ Card 6: 31 18 13 56 72 | 74 77 10 23 35 67 36 11
 # === Part 1 Solution: ===
 
 
+"""
+Card numbers are all small, so rather than a `set` the numbers on each side of a
+card are kept as the bits of an int. Finding the winning numbers you have is
+then a bitwise and, and counting them is counting the set bits.
+"""
+
+
 class Card(NamedTuple):
     number: int
-    winning_numbers: set[int]
-    have_numbers: set[int]
+    # Bit n is set if n is one of the numbers
+    winning_numbers: int
+    have_numbers: int
 
 
 line_pattern = re.compile(r"Card +(\d+): ([\d ]+) \| ([\d ]+)")
 
 
+def numbers_mask(numbers: str) -> int:
+    mask = 0
+    for num in numbers.split():
+        mask |= 1 << int(num)
+    return mask
+
+
 def parse_cards(puzzle_input: TextIO) -> Iterable[Card]:
     for line in puzzle_input:
         if m := line_pattern.fullmatch(line.strip()):
             yield Card(
                 number=int(m.group(1)),
-                winning_numbers={int(num) for num in m.group(2).split()},
-                have_numbers={int(num) for num in m.group(3).split()},
+                winning_numbers=numbers_mask(m.group(2)),
+                have_numbers=numbers_mask(m.group(3)),
             )
         else:
             raise ValueError(line)
 
 
 def card_win_count(card: Card) -> int:
-    return len(card.winning_numbers & card.have_numbers)
+    return (card.winning_numbers & card.have_numbers).bit_count()
 
 
-def part1(puzzle_input: TextIO) -> int:
-    """<solve part 1>"""
-    cards = parse_cards(puzzle_input)
-    win_count = (card_win_count(c) for c in cards)
+def win_counts(cards: Iterable[Card]) -> list[int]:
+    """Get the win count of every card."""
+    return [card_win_count(card) for card in cards]
+
+
+def solve_part1(cards: Iterable[Card]) -> int:
+    win_count = win_counts(cards)
     points = ((0 if wc == 0 else 2 ** (wc - 1)) for wc in win_count)
 
     return sum(points)
 
 
+def part1(puzzle_input: TextIO) -> int:
+    """<solve part 1>"""
+    return solve_part1(parse_cards(puzzle_input))
+
+
 """
 ### Part 2:
 
@@ -113,33 +140,106 @@ def card_copy_winnings(card: Card) -> Counter[int]:
     return Counter(range(card.number + 1, card.number + wins + 1))
 
 
-T = TypeVar("T")
+"""
+Every card wins copies of a run of the cards right after it, and all copies of
+a card win the same. So rather than tracking the count of every card in a
+`Counter`, each card adds its count to the start of the run it wins and takes it
+back off just after the end, in a flat list of changes. A running total of those
+changes, kept while going through the cards in order, is how many copies of
+each card have been won by the cards before it.
+"""
+
+
+def solve_part2(cards: Iterable[Card]) -> int:
+    card_wins = win_counts(cards)
+
+    # How much the number of won copies changes from the card before
+    copy_changes = [0] * (len(card_wins) + 1)
+    won_copies = 0
+    total = 0
+
+    for i, wins in enumerate(card_wins):
+        won_copies += copy_changes[i]
 
+        # Received the original card
+        card_count = won_copies + 1
+        total += card_count
+
+        # Cards will never make you copy a card past the end of the table
+        if wins:
+            copy_changes[i + 1] += card_count
+            copy_changes[min(i + 1 + wins, len(card_wins))] -= card_count
 
-def counter_multiply(counter: Counter[T], multiplier: int) -> Counter[T]:
-    return Counter({k: count * multiplier for k, count in counter.items()})
+    return total
 
 
 def part2(puzzle_input: TextIO) -> int:
     """<solve part 2>"""
-    card_counts: Counter[int] = Counter()
+    return solve_part2(parse_cards(puzzle_input))
+
+
+"""
+### Streaming
+
+A card only ever wins copies of the few cards right after it, so both parts can
+be worked out in a single pass over the cards while they're being parsed,
+without holding on to them. All that needs remembering is the copies won of
+the next few cards, which are queued up in order. The queue never gets longer
+than the most cards won by a single card.
+"""
+
+
+class Totals(NamedTuple):
+    points: int
+    cards: int
+
+
+def evaluate_cards(cards: Iterable[Card]) -> Totals:
+    """Get the answers to both parts in one pass, with memory that doesn't grow with the number of cards."""
+    # Copies won of each of the cards coming up next, starting at the next card
+    pending_copies: deque[int] = deque()
+    points = 0
+    total = 0
+
+    for card in cards:
+        wins = card_win_count(card)
+        if wins:
+            points += 2 ** (wins - 1)
 
-    for card in parse_cards(puzzle_input):
         # Received the original card
-        card_counts.setdefault(card.number, 0)
-        card_counts[card.number] += 1
+        card_count = (pending_copies.popleft() if pending_copies else 0) + 1
+        total += card_count
 
-        won_cards = card_copy_winnings(card)
-        card_counts += counter_multiply(won_cards, card_counts[card.number])
+        for i in range(wins):
+            if i < len(pending_copies):
+                pending_copies[i] += card_count
+            else:
+                pending_copies.append(card_count)
 
-    return card_counts.total()
+    return Totals(points, total)
+
+
+def test_evaluate_cards() -> None:
+    example = """\
+Card 1: 41 48 83 86 17 | 83 86  6 31 17  9 48 53
+Card 2: 13 32 20 16 61 | 61 30 68 82 17 32 24 19
+Card 3:  1 21 53 59 44 | 69 82 63 72 16 21 14  1
+Card 4: 41 92 73 84 69 | 59 84 76 51 58  5 54 83
+Card 5: 87 83 26 28 32 | 88 30 70 12 93 22 82 36
+Card 6: 31 18 13 56 72 | 74 77 10 23 35 67 36 11
+"""  # pycco needs this
+
+    assert evaluate_cards(parse_cards(io.StringIO(example))) == (13, 30)
+
+
+solution = Solution(parse_cards, solve_part1, solve_part2)
 
 
 if __name__ == "__main__":
+    cards = ParseCache(DEFAULT_CACHE_DIR).get(parse_cards, Path("input.txt"))
+
     # Print out part 1 solution
-    with Path("input.txt").open() as puzzle_input:
-        print("Part 1:", part1(puzzle_input))
+    print("Part 1:", solve_part1(cards))
 
     # Print out part 2 solution
-    with Path("input.txt").open() as puzzle_input:
-        print("Part 2:", part2(puzzle_input))
+    print("Part 2:", solve_part2(cards))
@@ -33,12 +33,17 @@ from __future__ import annotations
 
 import bisect
 import io
+import sys
+from array import array
 from itertools import chain, pairwise
 from pathlib import Path
-from typing import Iterable, NamedTuple, TextIO, overload
+from typing import Any, Iterable, NamedTuple, TextIO, overload
 
 from more_itertools import chunked
 
+sys.path.append("..")
+from utils import DEFAULT_CACHE_DIR, ParseCache, Solution, traced, tracer  # noqa: E402
+
 
 def test_part1() -> None:
     """For example:"""
@@ -257,6 +262,13 @@ class IntervalMap:
     def __init__(self, interval_offsets: Iterable[IntervalOffset]):
         # Keep the interval offsets sorted so that binary search can be used.
         self.interval_offsets = sorted(interval_offsets, key=lambda io: io.interval.start)
+        self.starts = [io.interval.start for io in self.interval_offsets]
+        self.boundaries = sorted(
+            set(chain.from_iterable((io.interval.start, io.interval.stop) for io in self.interval_offsets))
+        )
+
+        # NumPy arrays of the interval starts, stops, and offsets, made when first needed by `get_many()`
+        self._search_arrays: tuple[Any, Any, Any] | None = None
 
     @overload
     def get(self, value: int) -> int:
@@ -272,31 +284,99 @@ class IntervalMap:
             return self._multi_interval_get(value)
 
         # First, find which interval offset this value may possibly fall in to.
-        interval_index = bisect.bisect(self.interval_offsets, value, key=lambda io: io.interval.start)
-        interval_offset = self.interval_offsets[interval_index - 1]  # If this goes -1, then no big deal.
+        interval_index = bisect.bisect(self.starts, value)
+        if interval_index:
+            interval_offset = self.interval_offsets[interval_index - 1]
 
-        # If the value falls in to the interval, apply the offset and return.
-        if value in interval_offset.interval:
-            return value + interval_offset.offset
+            # If the value falls in to the interval, apply the offset and return.
+            if value in interval_offset.interval:
+                return value + interval_offset.offset
 
         # Otherwise, no interval matches so return the value unchanged.
         return value
 
+    def get_many(self, values: Any) -> Any:  # noqa: ANN401
+        """
+        Map a whole NumPy array, or `array("q")`, of integers at once, with a
+        vectorized binary search over all of them. Returns a NumPy array, or
+        an `array("q")` when NumPy isn't installed.
+        """
+        try:
+            import numpy as np
+        except ImportError:
+            return array("q", map(self.get, values))
+
+        values = np.asarray(values, dtype=np.int64)
+        if not self.interval_offsets:
+            return values.copy()
+
+        if self._search_arrays is None:
+            self._search_arrays = (
+                np.array(self.starts, dtype=np.int64),
+                np.array([io.interval.stop for io in self.interval_offsets], dtype=np.int64),
+                np.array([io.offset for io in self.interval_offsets], dtype=np.int64),
+            )
+        starts, stops, offsets = self._search_arrays
+
+        # The same as `get()`, the interval offset each value may fall in to is
+        # the one starting just before it, if there is one
+        interval_indexes = np.searchsorted(starts, values, side="right") - 1
+        has_interval = interval_indexes >= 0
+        interval_indexes[~has_interval] = 0
+        in_interval = has_interval & (values < stops[interval_indexes])
+
+        return values + np.where(in_interval, offsets[interval_indexes], 0)
+
     def _multi_interval_get(self, value: MultiInterval) -> MultiInterval:
         # First, chop up all of the intervals falling on mapper boundaries
-        chop_points = set(chain.from_iterable((io.interval.start, io.interval.stop) for io in self.interval_offsets))
-        chopped_intervals = list(self._chopped_intervals(value.intervals, sorted(chop_points)))
+        chopped_intervals = list(self._chopped_intervals(value.intervals, self.boundaries))
 
         # Then, map all the chopped intervals to their new values
         mapped_intervals = [(self.get(start), self.get(stop - 1) + 1) for start, stop in chopped_intervals]
 
         return MultiInterval(mapped_intervals)
 
+    def then(self, other: IntervalMap) -> IntervalMap:
+        """
+        Compose this map with another, into a single map that gives the same
+        values as mapping with this one and then the other.
+        """
+        # Within each piece between these boundaries, both maps have a single
+        # offset, so the composed map does too. There's a boundary wherever
+        # one of this map's intervals start or stop, and wherever a value gets
+        # mapped on to the start or stop of one of the other map's intervals.
+        boundaries = set(self.boundaries)
+        for other_boundary in other.boundaries:
+            boundaries.update(self._preimages(other_boundary))
+
+        # Outside of all the boundaries, both maps leave values unchanged
+        pieces: list[IntervalOffset] = []
+        for start, stop in pairwise(sorted(boundaries)):
+            offset = other.get(self.get(start)) - start
+            if offset == 0:
+                continue
+
+            # Join up neighboring pieces with the same offset
+            if pieces and pieces[-1].interval.stop == start and pieces[-1].offset == offset:
+                pieces[-1] = IntervalOffset(range(pieces[-1].interval.start, stop), offset)
+            else:
+                pieces.append(IntervalOffset(range(start, stop), offset))
+
+        return IntervalMap(pieces)
+
+    def _preimages(self, value: int) -> Iterable[int]:
+        """All the values that get mapped to the given value."""
+        if self.get(value) == value:
+            yield value
+        for interval_offset in self.interval_offsets:
+            if value - interval_offset.offset in interval_offset.interval:
+                yield value - interval_offset.offset
+
     @staticmethod
     def _chopped_intervals(intervals: list[tuple[int, int]], boundaries: list[int]) -> Iterable[tuple[int, int]]:
         """Chop up the given intervals on the given boundaries."""
         for start, stop in intervals:
-            chop_points = [b for b in boundaries if start < b < stop]
+            chop_points = boundaries[bisect.bisect_right(boundaries, start) : bisect.bisect_left(boundaries, stop)]
             yield from pairwise([start, *chop_points, stop])
 
 
@@ -306,8 +386,11 @@ Category = str
 class Almanac(NamedTuple):
     seeds: list[int]
     maps: dict[tuple[Category, Category], IntervalMap]
+    # All of the maps composed in to one, see `compose_maps()`
+    seed_to_location: IntervalMap
 
 
+@traced
 def parse_almanac(puzzle_input: TextIO) -> Almanac:
     def read_stripped() -> str:
         return puzzle_input.readline().strip()
@@ -326,7 +409,7 @@ def parse_almanac(puzzle_input: TextIO) -> Almanac:
             IntervalOffset.from_line(line) for line in iter(read_stripped, "")
         )
 
-    return Almanac(seed_numbers, maps)
+    return Almanac(seed_numbers, maps, compose_maps("seed", "location", maps))
 
 
 @overload
@@ -341,6 +424,7 @@ def walk_maps(
     ...
 
 
+@traced
 def walk_maps(category, value, maps):
     """
     Build up a dictionary of keys and values by traversing the given maps using
@@ -364,14 +448,91 @@ def walk_maps(category, value, maps):
         # Recurse into the next category.
         category = next_category
 
+    tracer.count("walk_maps.lookups", len(info) - 1)
+    return info
+
+
+@traced
+def walk_maps_batch(category: str, values: Any, maps: dict[tuple[Category, Category], IntervalMap]) -> dict[str, Any]:  # noqa: ANN401
+    """Walk the maps like `walk_maps()` does, but for a whole array of values at once using `IntervalMap.get_many()`."""
+    info = {category: values}
+
+    while next_category := next((dest for src, dest in maps if src == category), None):
+        values = maps[(category, next_category)].get_many(values)
+        info[next_category] = values
+        category = next_category
+
+    tracer.count("walk_maps_batch.lookups", (len(info) - 1) * len(values))
     return info
 
 
+def test_walk_maps_batch() -> None:
+    seed_to_soil = IntervalMap([IntervalOffset.from_line("50 98 2"), IntervalOffset.from_line("52 50 48")])
+    soil_to_fertilizer = IntervalMap([
+        IntervalOffset.from_line("0 15 37"),
+        IntervalOffset.from_line("37 52 2"),
+        IntervalOffset.from_line("39 0 15"),
+    ])
+    maps = {("seed", "soil"): seed_to_soil, ("soil", "fertilizer"): soil_to_fertilizer}
+
+    seeds = array("q", range(-5, 110))
+    info = walk_maps_batch("seed", seeds, maps)
+    assert list(info["soil"]) == [seed_to_soil.get(seed) for seed in seeds]
+    assert list(info["fertilizer"]) == [walk_maps("seed", seed, maps)["fertilizer"] for seed in seeds]
+
+    assert list(IntervalMap([]).get_many(seeds)) == list(seeds)
+
+
+"""
+Walking each seed through the maps one category at a time means a lookup in
+every map. Instead, all the maps from one category to another can be composed
+into one, so that each seed only takes a single lookup. The almanac's maps are
+composed from seed to location once, as it's parsed, and both parts share it.
+"""
+
+
+@traced
+def compose_maps(
+    category: Category, destination: Category, maps: dict[tuple[Category, Category], IntervalMap]
+) -> IntervalMap:
+    """Compose the maps that lead from one category to another, in to a single map."""
+    composed = IntervalMap([])
+
+    # Follow the categories the same way as `walk_maps()` does
+    while category != destination:
+        next_category = next(dest for src, dest in maps if src == category)
+        composed = composed.then(maps[(category, next_category)])
+        category = next_category
+
+    return composed
+
+
+def test_compose_maps() -> None:
+    seed_to_soil = IntervalMap([IntervalOffset.from_line("50 98 2"), IntervalOffset.from_line("52 50 48")])
+    soil_to_fertilizer = IntervalMap([
+        IntervalOffset.from_line("0 15 37"),
+        IntervalOffset.from_line("37 52 2"),
+        IntervalOffset.from_line("39 0 15"),
+    ])
+    maps = {("seed", "soil"): seed_to_soil, ("soil", "fertilizer"): soil_to_fertilizer}
+
+    composed = compose_maps("seed", "fertilizer", maps)
+    for seed in range(-5, 110):
+        assert composed.get(seed) == soil_to_fertilizer.get(seed_to_soil.get(seed))
+
+    seeds = MultiInterval([(0, 30), (45, 105)])
+    assert composed.get(seeds) == soil_to_fertilizer.get(seed_to_soil.get(seeds))
+
+    assert compose_maps("seed", "seed", maps).interval_offsets == []
+
+
+def solve_part1(almanac: Almanac) -> int:
+    return min(almanac.seed_to_location.get(seed) for seed in almanac.seeds)
+
+
 def part1(puzzle_input: TextIO) -> int:
     """<solve part 1>"""
-    almanac = parse_almanac(puzzle_input)
-
-    return min(walk_maps("seed", seed, almanac.maps)["location"] for seed in almanac.seeds)
+    return solve_part1(parse_almanac(puzzle_input))
 
 
 """
@@ -483,19 +644,24 @@ def test_multi_interval() -> None:
     assert mapper.get(MultiInterval([(79, 105)])) == MultiInterval([(50, 52), (81, 105)])
 
 
+def solve_part2(almanac: Almanac) -> int:
+    seeds = [MultiInterval([(start, start + count)]) for start, count in chunked(almanac.seeds, 2)]
+    return min(almanac.seed_to_location.get(seed).min_value() for seed in seeds)
+
+
 def part2(puzzle_input: TextIO) -> int:
     """<solve part 2>"""
-    almanac = parse_almanac(puzzle_input)
+    return solve_part2(parse_almanac(puzzle_input))
 
-    seeds = [MultiInterval([(start, start + count)]) for start, count in chunked(almanac.seeds, 2)]
-    return min(walk_maps("seed", seed, almanac.maps)["location"].min_value() for seed in seeds)
+
+solution = Solution(parse_almanac, solve_part1, solve_part2)
 
 
 if __name__ == "__main__":
+    almanac = ParseCache(DEFAULT_CACHE_DIR).get(parse_almanac, Path("input.txt"))
+
     # Print out part 1 solution
-    with Path("input.txt").open() as puzzle_input:
-        print("Part 1:", part1(puzzle_input))
+    print("Part 1:", solve_part1(almanac))
 
     # Print out part 2 solution
-    with Path("input.txt").open() as puzzle_input:
-        print("Part 2:", part2(puzzle_input))
+    print("Part 2:", solve_part2(almanac))
@@ -7,12 +7,16 @@ from __future__ import annotations
 
 import io
 import logging
+import sys
 from collections import Counter
 from enum import IntEnum
 from itertools import count
 from pathlib import Path
 from typing import Iterable, Iterator, NamedTuple, NewType, TextIO
 
+sys.path.append("..")
+from utils import DEFAULT_CACHE_DIR, ParseCache, Solution  # noqa: E402
+
 
 def test_score_kinds() -> None:
     # Every hand is exactly one type. From strongest to weakest, they are:
@@ -211,13 +215,16 @@ def parse(puzzle_input: TextIO) -> Iterable[Play]:
         yield Play(Hand.from_str(hand), int(bid))
 
 
-def part1(puzzle_input: TextIO) -> int:
-    """<solve part 1>"""
-    plays = parse(puzzle_input)
+def solve_part1(plays: Iterable[Play]) -> int:
     ranked_plays = sorted(plays, key=lambda p: score_hand(p.hand))
     return sum(rank * play.bid for rank, play in enumerate(ranked_plays, start=1))
 
 
+def part1(puzzle_input: TextIO) -> int:
+    """<solve part 1>"""
+    return solve_part1(parse(puzzle_input))
+
+
 """
 ### Part 2:
 
@@ -256,18 +263,24 @@ QQQJA 483
 # === Part 2 Solution: ===
 
 
-def part2(puzzle_input: TextIO) -> int:
-    """<solve part 2>"""
-    plays = parse(puzzle_input)
+def solve_part2(plays: Iterable[Play]) -> int:
     ranked_plays = sorted(plays, key=lambda p: score_hand(p.hand, use_jokers=True))
     return sum(rank * play.bid for rank, play in enumerate(ranked_plays, start=1))
 
 
+def part2(puzzle_input: TextIO) -> int:
+    """<solve part 2>"""
+    return solve_part2(parse(puzzle_input))
+
+
+solution = Solution(parse, solve_part1, solve_part2)
+
+
 if __name__ == "__main__":
+    plays = ParseCache(DEFAULT_CACHE_DIR).get(parse, Path("input.txt"))
+
     # Print out part 1 solution
-    with Path("input.txt").open() as puzzle_input:
-        print("Part 1:", part1(puzzle_input))
+    print("Part 1:", solve_part1(plays))
 
     # Print out part 2 solution
-    with Path("input.txt").open() as puzzle_input:
-        print("Part 2:", part2(puzzle_input))
+    print("Part 2:", solve_part2(plays))
@@ -10,10 +10,14 @@ import itertools
 import logging
 import math
 import re
+import sys
 from functools import reduce
 from pathlib import Path
 from typing import Iterable, NamedTuple, TextIO
 
+sys.path.append("..")
+from utils import DEFAULT_CACHE_DIR, ParseCache, Solution  # noqa: E402
+
 logging.basicConfig(level=logging.DEBUG)
 
 
@@ -64,10 +68,10 @@ class Node(NamedTuple):
         return cls(*m.groups())
 
 
-def parse(puzzle_input: TextIO) -> tuple[str, Iterable[Node]]:
+def parse(puzzle_input: TextIO) -> tuple[str, list[Node]]:
     turns = puzzle_input.readline().strip()
     puzzle_input.readline()
-    return turns, (Node.from_str(line.strip()) for line in puzzle_input)
+    return turns, [Node.from_str(line.strip()) for line in puzzle_input]
 
 
 def traverse_network(turns: str, node_map: dict[str, Node], *, start: str = "AAA") -> Iterable[str]:
@@ -81,9 +85,8 @@ def traverse_network(turns: str, node_map: dict[str, Node], *, start: str = "AAA
         yield current_node
 
 
-def part1(puzzle_input: TextIO) -> int:
-    """<solve part 1>"""
-    turns, nodes = parse(puzzle_input)
+def solve_part1(network: tuple[str, list[Node]]) -> int:
+    turns, nodes = network
     node_map = {n.name: n for n in nodes}
 
     numbered_steps = enumerate(traverse_network(turns, node_map), start=1)
@@ -92,6 +95,11 @@ def part1(puzzle_input: TextIO) -> int:
     return winning_step
 
 
+def part1(puzzle_input: TextIO) -> int:
+    """<solve part 1>"""
+    return solve_part1(parse(puzzle_input))
+
+
 """
 ### Part 2:
 
@@ -165,9 +173,8 @@ def get_ghost_loop(turns: str, moves: Iterable[str]) -> tuple[list[str], list[st
     return unwrap(path_until_loops[:loop_step]), unwrap(path_until_loops[loop_step:])
 
 
-def part2(puzzle_input: TextIO) -> int:
-    """<solve part 2>"""
-    turns, nodes = parse(puzzle_input)
+def solve_part2(network: tuple[str, list[Node]]) -> int:
+    turns, nodes = network
     node_map = {n.name: n for n in nodes}
 
     loop_lengths = []
@@ -190,11 +197,19 @@ def part2(puzzle_input: TextIO) -> int:
     return reduce(math.lcm, loop_lengths, 1)
 
 
+def part2(puzzle_input: TextIO) -> int:
+    """<solve part 2>"""
+    return solve_part2(parse(puzzle_input))
+
+
+solution = Solution(parse, solve_part1, solve_part2)
+
+
 if __name__ == "__main__":
+    network = ParseCache(DEFAULT_CACHE_DIR).get(parse, Path("input.txt"))
+
     # Print out part 1 solution
-    with Path("input.txt").open() as puzzle_input:
-        print("Part 1:", part1(puzzle_input))
+    print("Part 1:", solve_part1(network))
 
     # Print out part 2 solution
-    with Path("input.txt").open() as puzzle_input:
-        print("Part 2:", part2(puzzle_input))
+    print("Part 2:", solve_part2(network))
@@ -7,11 +7,15 @@ from __future__ import annotations
 
 import io
 import logging
+import sys
 from functools import reduce
 from itertools import pairwise, starmap
 from pathlib import Path
 from typing import Iterable, TextIO
 
+sys.path.append("..")
+from utils import DEFAULT_CACHE_DIR, ParseCache, Solution  # noqa: E402
+
 
 def test_part1() -> None:
     """For example:"""
@@ -60,11 +64,13 @@ def predicted_next_value(sequence: list[int]) -> int:
     return sum(seq[-1] for seq in diff_sequences(sequence))
 
 
+def solve_part1(sequences: Iterable[list[int]]) -> int:
+    return sum(map(predicted_next_value, sequences))
+
+
 def part1(puzzle_input: TextIO) -> int:
     """<solve part 1>"""
-    sequences = parse(puzzle_input)
-
-    return sum(map(predicted_next_value, sequences))
+    return solve_part1(parse(puzzle_input))
 
 
 """
@@ -92,6 +98,41 @@ def test_part2() -> None:
     assert part2(io.StringIO(example)) == 2
 
 
+def test_parse_cache(tmp_path: Path) -> None:
+    parse_count = 0
+
+    def counting_parse(puzzle_input: TextIO) -> Iterable[list[int]]:
+        nonlocal parse_count
+        parse_count += 1
+        return parse(puzzle_input)
+
+    input_path = tmp_path / "input.txt"
+    input_path.write_text("0 3 6\n1 3 6\n")
+    cache_dir = tmp_path / "cache"
+
+    cache = ParseCache(cache_dir, max_files=1)
+    sequences = cache.get(counting_parse, input_path)
+    assert sequences == [[0, 3, 6], [1, 3, 6]]
+    assert cache.get(counting_parse, input_path) is sequences
+
+    # Another cache picks up the pickle instead of parsing again
+    assert ParseCache(cache_dir).get(counting_parse, input_path) == sequences
+    assert parse_count == 1
+
+    # Changing the input means it has to be parsed again
+    input_path.write_text("10 13 16\n")
+    assert cache.get(counting_parse, input_path) == [[10, 13, 16]]
+    assert parse_count == 2
+
+    # Only the most recently used pickles are kept
+    other_path = tmp_path / "other.txt"
+    other_path.write_text("1 2 3\n")
+    cache.get(counting_parse, other_path)
+    assert len(list(cache_dir.glob("*.pickle"))) == 1
+    ParseCache(cache_dir, max_files=0).get(counting_parse, input_path)
+    assert list(cache_dir.glob("*.pickle")) == []
+
+
 """
 <end of problem description>
 """
@@ -104,18 +145,23 @@ def predicted_prev_value(sequence: list[int]) -> int:
     return reduce(lambda a,b: b - a, reversed(firsts), 0)
 
 
+def solve_part2(sequences: Iterable[list[int]]) -> int:
+    return sum(map(predicted_prev_value, sequences))
+
+
 def part2(puzzle_input: TextIO) -> int:
     """<solve part 2>"""
-    sequences = parse(puzzle_input)
+    return solve_part2(parse(puzzle_input))
 
-    return sum(map(predicted_prev_value, sequences))
+
+solution = Solution(parse, solve_part1, solve_part2)
 
 
 if __name__ == "__main__":
+    sequences = ParseCache(DEFAULT_CACHE_DIR).get(parse, Path("input.txt"))
+
     # Print out part 1 solution
-    with Path("input.txt").open() as puzzle_input:
-        print("Part 1:", part1(puzzle_input))
+    print("Part 1:", solve_part1(sequences))
 
     # Print out part 2 solution
-    with Path("input.txt").open() as puzzle_input:
-        print("Part 2:", part2(puzzle_input))
+    print("Part 2:", solve_part2(sequences))
@@ -5,7 +5,18 @@ source all messy by copy and pasting it.
 
 from __future__ import annotations
 
-from typing import TYPE_CHECKING, Iterable, NamedTuple, TypeVar
+import functools
+import hashlib
+import inspect
+import mmap
+import os
+import pickle
+import sys
+import time
+from collections import Counter, defaultdict
+from contextlib import contextmanager, suppress
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Callable, Iterable, Iterator, NamedTuple, ParamSpec, TextIO, TypeVar
 
 
 class Pos(NamedTuple):
@@ -16,9 +27,45 @@ class Pos(NamedTuple):
         return Pos(self.x + other.x, self.y + other.y)
 
 
+# Unit steps to the 4 orthogonal neighbors, and to all 8 adjacent neighbors
+ORTHOGONALS = (Pos(0, -1), Pos(1, 0), Pos(0, 1), Pos(-1, 0))
+ADJACENTS = tuple(Pos(x, y) for y in (-1, 0, 1) for x in (-1, 0, 1) if (x, y) != (0, 0))
+
+
+class PosPacker(NamedTuple):
+    """
+    Packs grid positions in to single ints as `y * stride + x`. An int is far
+    smaller than a `Pos` and cheaper to hash, and a step to a neighbor is just
+    adding a precomputed offset rather than building a new tuple.
+
+    The stride needs to be wider than the grid, so that stepping off the left
+    or right of a row lands in the padding column rather than wrapping around
+    on to the next row. The row stride of a `MappedInput` (the width plus the
+    newline) works nicely, since packed positions are then the byte offsets of
+    each cell in the input.
+    """
+
+    stride: int
+
+    @classmethod
+    def for_width(cls, width: int) -> PosPacker:
+        return cls(width + 1)
+
+    def pack(self, pos: Pos) -> int:
+        return pos.y * self.stride + pos.x
+
+    def unpack(self, packed: int) -> Pos:
+        y, x = divmod(packed, self.stride)
+        return Pos(x, y)
+
+    def offsets(self, steps: Iterable[Pos]) -> tuple[int, ...]:
+        """Packed offsets for steps, e.g. `ADJACENTS`, to add to packed positions."""
+        return tuple(self.pack(step) for step in steps)
+
+
 if TYPE_CHECKING:
-    from _typeshed import SupportsRichComparison
-    T = TypeVar("T", bound=SupportsRichComparison)
+    from _typeshed import SupportsDunderLT
+    T = TypeVar("T", bound=SupportsDunderLT[Any])
 
 def extent(iterable: Iterable[T]) -> tuple[T, T]:
     it = iter(iterable)
@@ -31,17 +78,463 @@ def extent(iterable: Iterable[T]) -> tuple[T, T]:
     min_extent = first_item
     max_extent = first_item
 
+    # Plain comparisons are a good bit cheaper than calling `min()` and `max()`
+    # for every item, and an item can't be both a new min and a new max.
     for i in it:
-        min_extent = min(min_extent, i)
-        max_extent = max(max_extent, i)
+        if i < min_extent:
+            min_extent = i
+        elif max_extent < i:
+            max_extent = i
 
     return min_extent, max_extent
 
 
 def pos_extent(positions: Iterable[Pos]) -> tuple[range, range]:
-    positions = list(positions)
+    """
+    Find the ranges of x and y covered by the positions in a single pass over
+    them. An `(N, 2)` NumPy array of x, y coordinates is also accepted, and has
+    its extent found with vectorized `min()` and `max()` instead.
+    """
+    if getattr(positions, "ndim", None) == 2:
+        return _array_extent(positions)
+
+    it = iter(positions)
+
+    try:
+        x_min, y_min = x_max, y_max = next(it)
+    except StopIteration:
+        msg = "No positions to find the extent of"
+        raise ValueError(msg) from None
 
-    x_min, x_max = extent(pos.x for pos in positions)
-    y_min, y_max = extent(pos.y for pos in positions)
+    for x, y in it:
+        if x < x_min:
+            x_min = x
+        elif x > x_max:
+            x_max = x
+
+        if y < y_min:
+            y_min = y
+        elif y > y_max:
+            y_max = y
 
     return range(x_min, x_max + 1), range(y_min, y_max + 1)
+
+
+def _array_extent(coords: Any) -> tuple[range, range]:  # noqa: ANN401
+    if len(coords) == 0:
+        msg = "No positions to find the extent of"
+        raise ValueError(msg)
+
+    (x_min, y_min), (x_max, y_max) = coords.min(axis=0).tolist(), coords.max(axis=0).tolist()
+    return range(x_min, x_max + 1), range(y_min, y_max + 1)
+
+
+M = TypeVar("M", bound="MappedInput")
+
+# A few chunks per worker evens things out when some chunks are slower
+CHUNKS_PER_WORKER = 4
+
+
+class MappedInput:
+    """
+    Puzzle input as raw bytes rather than decoded lines of text. Files are
+    memory mapped, so nothing is read until it is looked at and nothing is
+    copied unless asked for. This lets parsers use `bytes.find()` and `re` to
+    scan the whole input at C speed instead of building a `str` per line.
+
+    Views handed out by `lines()` point in to the mapped file, so a mapped file
+    can't be closed while any of them are still around. Release them, or let
+    go of them, first.
+    """
+
+    def __init__(self, buffer: bytes | mmap.mmap):
+        self.buffer = buffer
+
+    @classmethod
+    def open(cls, path: Path) -> MappedInput:  # noqa: A003
+        with path.open("rb") as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                # Empty files can't be mapped
+                return cls(b"")
+            return cls(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+
+    def close(self) -> None:
+        if isinstance(self.buffer, mmap.mmap):
+            self.buffer.close()
+
+    def __enter__(self: M) -> M:
+        return self
+
+    def __exit__(self, *args: object) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return len(self.buffer)
+
+    def lines(self) -> Iterator[memoryview]:
+        """Yield each line, without its newline, as a view in to the buffer."""
+        # Let go of the whole buffer view once done, even when stopped early
+        with memoryview(self.buffer) as view:
+            start = 0
+            while start < len(view):
+                end = self.buffer.find(b"\n", start)
+                if end == -1:
+                    end = len(view)
+                yield view[start:end]
+                start = end + 1
+
+    def find_all(self, sub: bytes) -> Iterator[int]:
+        """Yield the offset of every occurrence of `sub`."""
+        offset = self.buffer.find(sub)
+        while offset != -1:
+            yield offset
+            offset = self.buffer.find(sub, offset + 1)
+
+    def line_chunks(self, jobs: int | None = None, max_chunk_bytes: int | None = None) -> list[range]:
+        """
+        Split the input in to byte ranges of similar size for `jobs` worker
+        processes (by default, one per CPU) to share. Each range ends just after
+        a newline, so no line is split between two ranges. If given, ranges are
+        kept to about `max_chunk_bytes` long.
+        """
+        count = (jobs or os.cpu_count() or 1) * CHUNKS_PER_WORKER
+        if max_chunk_bytes:
+            count = max(count, -(-len(self.buffer) // max_chunk_bytes))
+
+        chunk_size = max(len(self.buffer) // count, 1)
+        chunks = []
+        start = 0
+        while start < len(self.buffer):
+            end = self.buffer.find(b"\n", start + chunk_size - 1)
+            end = len(self.buffer) if end == -1 else end + 1
+            chunks.append(range(start, end))
+            start = end
+        return chunks
+
+    def row_stride(self) -> int:
+        """
+        For grid inputs where every line is the same length, the number of
+        bytes from the start of one row to the next. A byte offset can then be
+        turned in to a position with `divmod(offset, stride)`.
+        """
+        first_newline = self.buffer.find(b"\n")
+        return len(self.buffer) + 1 if first_newline == -1 else first_newline + 1
+
+
+class ByteGrid:
+    """
+    A rectangular grid of single byte characters, such as a puzzle map. Rather
+    than a dict from `Pos` to character, which costs around 100 bytes a cell,
+    the grid is kept as one flat `bytearray` laid out exactly like the input
+    text, a newline at the end of every row included. That makes building one
+    a single copy, and each cell costs a byte.
+
+    Cells are addressed by packed positions from `packer`. The newline column
+    doubles as the padding column the packer needs, so stepping off the side of
+    a row never wraps on to the next one. Use `to_numpy()` to view the grid as
+    a NumPy array, if NumPy is installed.
+    """
+
+    def __init__(self, data: bytes | bytearray | mmap.mmap):
+        self.data = bytearray(data)
+        if self.data and not self.data.endswith(b"\n"):
+            self.data += b"\n"
+
+        first_newline = self.data.find(b"\n")
+        self.width = max(first_newline, 0)
+        self.packer = PosPacker.for_width(self.width)
+        self.height = len(self.data) // self.packer.stride
+        self._step_offsets: dict[tuple[Pos, ...], tuple[tuple[Pos, int], ...]] = {}
+
+        if len(self.data) != self.height * self.packer.stride:
+            msg = "Every row of the grid must be the same width"
+            raise ValueError(msg)
+
+    @classmethod
+    def from_text(cls, puzzle_input: TextIO) -> ByteGrid:
+        return cls(puzzle_input.read().encode())
+
+    @classmethod
+    def from_file(cls, path: Path) -> ByteGrid:
+        """Copy a grid straight out of a mapped file, without decoding it as text."""
+        with MappedInput.open(path) as grid_input:
+            return cls(grid_input.buffer)
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, ByteGrid):
+            return NotImplemented
+        return self.data == other.data
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__qualname__}({bytes(self.data)!r})"
+
+    def copy(self) -> ByteGrid:
+        return ByteGrid(self.data)
+
+    def in_bounds(self, packed: int) -> bool:
+        return 0 <= packed < len(self.data) and packed % self.packer.stride != self.width
+
+    def __getitem__(self, packed: int) -> str:
+        return chr(self.data[packed])
+
+    def __setitem__(self, packed: int, char: str) -> None:
+        self.data[packed] = ord(char)
+
+    def row(self, y: int) -> bytes:
+        start = y * self.packer.stride
+        return bytes(self.data[start : start + self.width])
+
+    def column(self, x: int) -> bytes:
+        return bytes(self.data[x :: self.packer.stride])
+
+    def neighbors(self, packed: int, steps: tuple[Pos, ...] = ADJACENTS) -> Iterator[tuple[Pos, int]]:
+        """Yield each of the steps that stays in the grid, with the packed position it leads to."""
+        step_offsets = self._step_offsets.get(steps)
+        if step_offsets is None:
+            step_offsets = self._step_offsets[steps] = tuple(zip(steps, self.packer.offsets(steps)))
+
+        for step, offset in step_offsets:
+            if self.in_bounds(packed + offset):
+                yield step, packed + offset
+
+    def find_all(self, char: str) -> Iterator[int]:
+        """Yield the packed position of every cell holding the given character."""
+        byte = char.encode()
+        packed = self.data.find(byte)
+        while packed != -1:
+            yield packed
+            packed = self.data.find(byte, packed + 1)
+
+    def to_numpy(self) -> Any:  # noqa: ANN401
+        """View the grid as a `height` by `width` uint8 array. Needs NumPy."""
+        import numpy as np
+
+        rows = np.frombuffer(self.data, dtype=np.uint8).reshape(self.height, self.packer.stride)
+        return rows[:, : self.width]
+
+
+def digit_mask(data: Any) -> Any:  # noqa: ANN401
+    """Mark which bytes of a NumPy uint8 array are ASCII digits."""
+    # Bytes below "0" wrap around to big numbers, so one comparison does it
+    return data - data.dtype.type(ord("0")) < 10
+
+
+class Solution(NamedTuple):
+    """
+    A day that parses its input the same way for both parts can expose this as
+    `solution` so that whatever runs it only has to parse the input once. Both
+    solvers are handed the same parsed input, so they must not modify it.
+
+    If the day also has a parser that reads a `MappedInput`, it will be used in
+    place of the text parser.
+    """
+
+    parse: Callable[[TextIO], Any]
+    part1: Callable[[Any], int]
+    part2: Callable[[Any], int]
+    parse_mapped: Callable[[MappedInput], Any] | None = None
+
+
+P = TypeVar("P")
+
+DEFAULT_CACHE_DIR = Path(__file__).parent / ".parse_cache"
+
+_missing = object()
+
+
+class ParseCache:
+    """
+    Remembers what a parser made of an input file so that it is only parsed
+    once. Entries are keyed on the parser, the input file's path, size, and
+    modification time, and the modification times of the parser's source file
+    and of this file, since parsed inputs can be made of classes from here.
+
+    Parsed inputs are always kept in memory. If a cache directory is given they
+    are also pickled there so that later runs can skip parsing, and the least
+    recently used pickles are evicted once there are more than `max_files`.
+    Parsers that lazily yield their results are run to completion so that the
+    results can be reused.
+    """
+
+    def __init__(self, cache_dir: Path | None = None, max_files: int = 32):
+        self.cache_dir = cache_dir
+        self.max_files = max_files
+        self._memory: dict[str, Any] = {}
+
+    def get(self, parse: Callable[[TextIO], P], path: Path) -> P:
+        return self._get(parse, path, lambda p: p.open())
+
+    def get_mapped(self, parse: Callable[[MappedInput], P], path: Path) -> P:
+        return self._get(parse, path, MappedInput.open)
+
+    def _get(self, parse: Callable[[Any], P], path: Path, open_input: Callable[[Path], Any]) -> P:
+        key = self._key(parse, path)
+        if key in self._memory:
+            return self._memory[key]
+
+        parsed = self._load(key)
+        if parsed is _missing:
+            with open_input(path) as puzzle_input:
+                parsed = parse(puzzle_input)
+                if isinstance(parsed, Iterator):
+                    parsed = list(parsed)
+            self._store(key, parsed)
+
+        self._memory[key] = parsed
+        return parsed  # type: ignore[return-value]
+
+    @staticmethod
+    def _key(parse: Callable[[Any], Any], path: Path) -> str:
+        source_mtime = Path(inspect.getfile(inspect.unwrap(parse))).stat().st_mtime_ns
+        utils_mtime = Path(__file__).stat().st_mtime_ns
+        stat = path.stat()
+        raw_key = (
+            f"{parse.__module__}.{parse.__qualname__}:{source_mtime}:{utils_mtime}:"
+            f"{path.resolve()}:{stat.st_size}:{stat.st_mtime_ns}"
+        )
+        return hashlib.sha256(raw_key.encode()).hexdigest()
+
+    def _load(self, key: str) -> Any:  # noqa: ANN401
+        if self.cache_dir is None:
+            return _missing
+
+        pickle_path = self.cache_dir / f"{key}.pickle"
+        try:
+            with pickle_path.open("rb") as f:
+                parsed = pickle.load(f)  # noqa: S301
+        except (OSError, EOFError, pickle.UnpicklingError, AttributeError, ImportError):
+            # Not cached yet, or cached by a version of the code that's gone
+            return _missing
+
+        # Mark as recently used, unless another process has just evicted it
+        with suppress(FileNotFoundError):
+            os.utime(pickle_path)
+        return parsed
+
+    def _store(self, key: str, parsed: object) -> None:
+        if self.cache_dir is None:
+            return
+
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+        # Write to a temporary file first so that other processes never see a
+        # partially written pickle.
+        pickle_path = self.cache_dir / f"{key}.pickle"
+        temp_path = pickle_path.with_suffix(f".{os.getpid()}.tmp")
+        with temp_path.open("wb") as f:
+            pickle.dump(parsed, f, protocol=pickle.HIGHEST_PROTOCOL)
+        temp_path.replace(pickle_path)
+
+        # Evict the least recently used pickles. Other processes may be evicting
+        # them at the same time, so any of them can vanish along the way.
+        pickles = []
+        for cached_path in self.cache_dir.glob("*.pickle"):
+            with suppress(FileNotFoundError):
+                pickles.append((cached_path.stat().st_mtime_ns, cached_path))
+        pickles.sort()
+        for _, stale_path in pickles[: max(len(pickles) - self.max_files, 0)]:
+            stale_path.unlink(missing_ok=True)
+
+
+TRACE_ENV_VAR = "AOC_TRACE"
+
+
+class PhaseStats:
+    def __init__(self) -> None:
+        self.calls = 0
+        self.seconds = 0.0
+        self.net_blocks = 0
+
+
+class Tracer:
+    """
+    Records how long named phases of a solution take, so that it's easy to see
+    whether the time goes to parsing, building up data, or actually solving.
+    Phases nest, and each is recorded under the stack of phases it ran inside
+    of. Alongside time, each phase tracks how many more memory blocks are
+    allocated once it's done than before it started. Solutions can also keep
+    named counts of whatever work they are doing.
+
+    Tracing is off unless the `AOC_TRACE` environment variable is set when this
+    module is first imported, so that `traced` can leave functions untouched.
+    """
+
+    def __init__(self, *, enabled: bool):
+        self.enabled = enabled
+        self.reset()
+
+    def reset(self) -> None:
+        self.phases: dict[tuple[str, ...], PhaseStats] = {}
+        self.counters: Counter[str] = Counter()
+        self._stack: list[str] = []
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        if not self.enabled:
+            yield
+            return
+
+        self._stack.append(name)
+        stats = self.phases.setdefault(tuple(self._stack), PhaseStats())
+        blocks = sys.getallocatedblocks()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            stats.seconds += time.perf_counter() - start
+            stats.net_blocks += sys.getallocatedblocks() - blocks
+            stats.calls += 1
+            self._stack.pop()
+
+    def count(self, name: str, amount: int = 1) -> None:
+        if self.enabled:
+            self.counters[name] += amount
+
+    def to_json(self) -> dict[str, Any]:
+        """All phases with their total and self times, plus the counters."""
+        child_seconds: defaultdict[tuple[str, ...], float] = defaultdict(float)
+        for stack, stats in self.phases.items():
+            child_seconds[stack[:-1]] += stats.seconds
+
+        return {
+            "phases": [
+                {
+                    "stack": list(stack),
+                    "calls": stats.calls,
+                    "seconds": stats.seconds,
+                    "self_seconds": stats.seconds - child_seconds[stack],
+                    "net_blocks": stats.net_blocks,
+                }
+                for stack, stats in self.phases.items()
+            ],
+            "counters": dict(self.counters),
+        }
+
+
+def folded_stacks(trace: dict[str, Any]) -> Iterator[str]:
+    """
+    Turn a trace from `Tracer.to_json()` in to the folded stack format that
+    flame graph tools read, weighted by microseconds of self time.
+    """
+    for phase in trace["phases"]:
+        microseconds = round(phase["self_seconds"] * 1_000_000)
+        yield f"{';'.join(phase['stack'])} {max(microseconds, 0)}"
+
+
+tracer = Tracer(enabled=bool(os.environ.get(TRACE_ENV_VAR)))
+
+Params = ParamSpec("Params")
+R = TypeVar("R")
+
+
+def traced(func: Callable[Params, R]) -> Callable[Params, R]:
+    """Record every call to the decorated function as a phase of the same name."""
+    if not tracer.enabled:
+        return func
+
+    @functools.wraps(func)
+    def wrapper(*args: Params.args, **kwargs: Params.kwargs) -> R:
+        with tracer.phase(func.__name__):
+            return func(*args, **kwargs)
+
+    return wrapper